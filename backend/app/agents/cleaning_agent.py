@@ -1,23 +1,39 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from app.agents.fingerprint_agent import row_hashes
+
+DATE_SAMPLE_SIZE = 1000
+DATE_MATCH_RATIO = 0.95
+DATE_FORMATS = [
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M",
+    "%m/%d/%Y", "%d/%m/%Y", "%m/%d/%Y %H:%M", "%d/%m/%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%Y/%m/%d",
+    "%d-%m-%Y", "%m-%d-%Y", "%d.%m.%Y", "%b %d, %Y", "%d %b %Y", "ISO8601",
+]
 
 class DataCleaningAgent:
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, prior_duplicates: int = 0):
         self.df = df.copy()
+        self.prior_duplicates = prior_duplicates
+        self.row_hashes: Optional[np.ndarray] = None
         self.report = {
-            "original_shape": df.shape,
+            "original_shape": (df.shape[0] + prior_duplicates, df.shape[1]),
             "missing_values": {},
             "duplicates_removed": 0,
             "outliers_detected": {},
             "data_types_fixed": [],
+            "datetime_columns": {},
+            "unparsed_dates": {},
             "actions_taken": []
         }
     
     def clean(self) -> tuple[pd.DataFrame, Dict[str, Any]]:
         self._handle_missing_values()
-        self._remove_duplicates()
+        # Types are fixed before deduplication so rows that only differ by
+        # whitespace are caught, and the fingerprints describe the final rows
         self._fix_data_types()
+        self._remove_duplicates()
         self._detect_outliers()
         self.report["final_shape"] = self.df.shape
         return self.df, self.report
@@ -38,15 +54,60 @@ class DataCleaningAgent:
                         self.report["actions_taken"].append(f"Filled {col} with mode")
     
     def _remove_duplicates(self):
-        before = len(self.df)
-        self.df.drop_duplicates(inplace=True)
-        self.report["duplicates_removed"] = before - len(self.df)
+        # One vectorized 64-bit hash per row, kept for EDA and incremental appends
+        hashes = row_hashes(self.df)
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        self.df = self.df[keep]
+        self.row_hashes = hashes[keep]
+        self.report["duplicates_removed"] = self.prior_duplicates + int((~keep).sum())
         if self.report["duplicates_removed"] > 0:
             self.report["actions_taken"].append(f"Removed {self.report['duplicates_removed']} duplicates")
     
     def _fix_data_types(self):
         for col in self.df.select_dtypes(include=['object']).columns:
             self.df[col] = self.df[col].str.strip() if self.df[col].dtype == 'object' else self.df[col]
+            self._parse_dates(col)
+    
+    def _parse_dates(self, col: str):
+        values = self.df[col].dropna()
+        if values.empty:
+            return
+        sample = values.sample(min(len(values), DATE_SAMPLE_SIZE), random_state=0).astype(str)
+        fmt = self._infer_date_format(sample)
+        if fmt is None:
+            return
+        
+        # One vectorized parse with the inferred format instead of per-value guessing
+        parsed = pd.to_datetime(self.df[col], format=fmt, errors='coerce')
+        if not pd.api.types.is_datetime64_any_dtype(parsed):
+            # Mixed UTC offsets come back as plain objects, so normalise to UTC
+            parsed = pd.to_datetime(self.df[col], format=fmt, errors='coerce', utc=True)
+        if parsed.notna().sum() < DATE_MATCH_RATIO * len(values):
+            return
+        self.df[col] = parsed
+        self.report["datetime_columns"][col] = fmt
+        self.report["data_types_fixed"].append(f"{col}: object -> datetime64 ({fmt})")
+        self.report["actions_taken"].append(f"Parsed {col} as dates")
+        
+        # Values that do not match the format become missing after missing
+        # values were handled, so they are reported here
+        coerced = int(parsed.isna().sum() - (len(self.df) - len(values)))
+        if coerced > 0:
+            self.report["missing_values"][col] = self.report["missing_values"].get(col, 0) + coerced
+            self.report["unparsed_dates"][col] = coerced
+            self.report["actions_taken"].append(f"Set {coerced} unparseable {col} values to missing")
+    
+    @staticmethod
+    def _infer_date_format(sample: pd.Series) -> Optional[str]:
+        if not (sample.str.contains(r"\d").all() and sample.str.contains(r"[-/.:T ]").all()):
+            return None
+        if pd.to_numeric(sample, errors='coerce').notna().mean() > 0.5:
+            return None
+        for fmt in DATE_FORMATS:
+            parsed = pd.to_datetime(sample, format=fmt, errors='coerce')
+            if parsed.notna().mean() >= DATE_MATCH_RATIO:
+                return fmt
+        return None
     
     def _detect_outliers(self):
         numeric_cols = self.df.select_dtypes(include=[np.number]).columns
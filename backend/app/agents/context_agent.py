@@ -0,0 +1,117 @@
+import re
+import math
+from collections import Counter
+from typing import Dict, Any, List
+
+# Rough token estimate for prompt budgeting; avoids shipping a tokenizer.
+CHARS_PER_TOKEN = 4
+
+class ContextAgent:
+    @staticmethod
+    def _terms(text: str) -> List[str]:
+        text = re.sub(r"([a-z])([A-Z])", r"\1 \2", str(text))
+        return [t for t in re.split(r"[^a-z0-9]+", text.lower()) if len(t) > 1]
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        return len(text) // CHARS_PER_TOKEN + 1
+
+    @staticmethod
+    def _column_summary(col: str, info: Dict[str, Any]) -> str:
+        line = f"- {col}: {info.get('dtype', 'unknown')} ({info.get('unique_values', 0)} unique values"
+        if info.get("missing_count"):
+            line += f", {info['missing_count']} missing"
+        line += ")"
+        if "mean" in info:
+            line += f", mean {info['mean']:.4g}, median {info.get('median', 0):.4g}"
+        elif info.get("min") is not None:
+            line += f", from {info['min']} to {info['max']}"
+        elif info.get("top_values"):
+            top = ", ".join(f"{k} ({v})" for k, v in list(info["top_values"].items())[:3])
+            line += f", top values: {top}"
+        return line
+
+    @classmethod
+    def build_index(cls, filename: str, analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+        eda = analysis_result.get("eda_results") or {}
+        cleaning = analysis_result.get("cleaning_report") or {}
+        overview = eda.get("overview", {})
+        quality = eda.get("data_quality", {})
+        column_analysis = eda.get("column_analysis", {})
+
+        rows = overview.get('rows', 'N/A')
+        prefix = f"""You are analyzing the dataset '{filename}'.
+
+Dataset Overview:
+- Total Rows: {f"{rows:,}" if isinstance(rows, int) else rows}
+- Total Columns: {overview.get('columns', 'N/A')}
+- Data Completeness: {quality.get('completeness', 0):.1f}%
+- Memory Usage: {overview.get('memory_usage', 'N/A')}
+
+Data Quality:
+- Missing Values: {len(cleaning.get('missing_values', {}))} columns affected
+- Duplicates Removed: {cleaning.get('duplicates_removed', 0)}
+- Outliers Detected: {len(cleaning.get('outliers_detected', {}))} columns
+- Numeric Columns: {quality.get('numeric_columns', 0)}
+- Categorical Columns: {quality.get('categorical_columns', 0)}
+"""
+
+        documents = []
+        for col, info in column_analysis.items():
+            terms = cls._terms(col) * 3 + cls._terms(info.get("dtype", ""))
+            terms += [t for value in (info.get("top_values") or {}) for t in cls._terms(value)]
+            documents.append({"column": col, "summary": cls._column_summary(col, info), "terms": Counter(terms)})
+
+        doc_freq = Counter(term for doc in documents for term in doc["terms"])
+        n_docs = len(documents)
+        idf = {term: math.log((n_docs + 1) / (df + 1)) + 1 for term, df in doc_freq.items()}
+
+        columns = []
+        for doc in documents:
+            weights = {term: tf * idf[term] for term, tf in doc["terms"].items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            columns.append({
+                "column": doc["column"],
+                "summary": doc["summary"],
+                "weights": {term: w / norm for term, w in weights.items()}
+            })
+
+        return {"prefix": prefix, "prefix_tokens": cls.estimate_tokens(prefix), "idf": idf, "columns": columns}
+
+    @classmethod
+    def rank_columns(cls, index: Dict[str, Any], question: str) -> List[Dict[str, Any]]:
+        idf = index["idf"]
+        query = Counter(t for t in cls._terms(question) if t in idf)
+        if not query:
+            return list(index["columns"])
+        weights = {term: tf * idf[term] for term, tf in query.items()}
+        scored = [
+            (sum(w * col["weights"].get(term, 0.0) for term, w in weights.items()), i, col)
+            for i, col in enumerate(index["columns"])
+        ]
+        # Stable on ties so unrelated columns keep their dataset order
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [col for _, _, col in scored]
+
+    @classmethod
+    def build_prompt(cls, index: Dict[str, Any], question: str, token_budget: int) -> str:
+        suffix = f"""
+User Question: {question}
+
+Provide a clear, concise answer based on the data above. If asked about specific columns, trends, or recommendations, use the context provided."""
+        header = "\nColumn Details (most relevant first):\n"
+        remaining = token_budget - index["prefix_tokens"] - cls.estimate_tokens(header + suffix)
+
+        lines = []
+        for col in cls.rank_columns(index, question):
+            cost = cls.estimate_tokens(col["summary"] + "\n")
+            if cost > remaining:
+                break
+            lines.append(col["summary"])
+            remaining -= cost
+
+        omitted = len(index["columns"]) - len(lines)
+        if omitted > 0:
+            lines.append(f"- ... {omitted} more columns not shown")
+
+        return index["prefix"] + header + "\n".join(lines) + "\n" + suffix
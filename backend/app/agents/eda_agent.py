@@ -3,8 +3,9 @@ import numpy as np
 from typing import Dict, Any
 
 class EDAAgent:
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, duplicates_removed: int = 0):
         self.df = df
+        self.duplicates_removed = duplicates_removed
     
     def analyze(self) -> Dict[str, Any]:
         return {
@@ -55,6 +56,9 @@ class EDAAgent:
                 col_data["kurtosis"] = float(self.df[col].kurtosis())
                 col_data["mean"] = float(self.df[col].mean())
                 col_data["median"] = float(self.df[col].median())
+            elif pd.api.types.is_datetime64_any_dtype(self.df[col]):
+                col_data["min"] = self.df[col].min().isoformat() if self.df[col].notna().any() else None
+                col_data["max"] = self.df[col].max().isoformat() if self.df[col].notna().any() else None
             else:
                 top_values = self.df[col].value_counts().head(5).to_dict()
                 col_data["top_values"] = {str(k): int(v) for k, v in top_values.items()}
@@ -66,7 +70,9 @@ class EDAAgent:
     def _assess_quality(self) -> Dict[str, Any]:
         return {
             "completeness": float((1 - self.df.isnull().sum().sum() / (self.df.shape[0] * self.df.shape[1])) * 100),
-            "duplicate_rows": int(self.df.duplicated().sum()),
+            "duplicate_rows": int(self.duplicates_removed),
             "numeric_columns": int(len(self.df.select_dtypes(include=[np.number]).columns)),
-            "categorical_columns": int(len(self.df.select_dtypes(include=['object']).columns))
+            "categorical_columns": int(len(self.df.select_dtypes(include=['object']).columns)),
+            "datetime_columns": int(len(self.df.select_dtypes(include=['datetime', 'datetimetz']).columns))
         }
+
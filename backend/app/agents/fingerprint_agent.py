@@ -0,0 +1,83 @@
+import os
+import math
+import shutil
+import tempfile
+import pandas as pd
+import numpy as np
+
+RECORD = np.dtype([("hash", np.uint64), ("row", np.int64)])
+MAX_PARTITIONS = 256
+
+def _normalize(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(values):
+        # Timestamps hash by their UTC nanoseconds, since str() renders the
+        # same instant as '2024-01-01' or '2024-01-01 00:00:00' depending on
+        # the rest of the column; NaT maps to its own sentinel value
+        if values.dt.tz is not None:
+            values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+        return pd.Series(values.astype("datetime64[ns]").to_numpy().view(np.int64), index=values.index)
+    if pd.api.types.is_numeric_dtype(values) and values.dtype != bool:
+        return values.astype("float64")
+    return values.astype(str)
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    # Numeric columns are hashed as float64 so that an int64 history and a
+    # float64 batch (or vice versa) fingerprint identical rows the same way.
+    normalized = pd.DataFrame({col: _normalize(df[col]) for col in df.columns})
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy(dtype=np.uint64)
+
+class FingerprintAgent:
+    def __init__(self, file_path: str, encoding: str, memory_limit: int, chunksize: int = 100_000):
+        self.file_path = file_path
+        self.encoding = encoding
+        self.memory_limit = memory_limit
+        self.chunksize = chunksize
+
+    def find_duplicate_rows(self) -> np.ndarray:
+        # Two passes in bounded memory: rows are hashed chunk by chunk and
+        # spilled to partition files by hash, then each partition (small
+        # enough to fit in memory) is sorted to find repeated fingerprints.
+        # Rows are compared as raw text, so this only catches exact textual
+        # duplicates; the in-memory pass in cleaning handles the rest.
+        size = os.path.getsize(self.file_path)
+        partitions = min(MAX_PARTITIONS, max(1, math.ceil(4 * size / self.memory_limit)))
+        spill_dir = tempfile.mkdtemp(prefix="fingerprints_", dir=os.path.dirname(self.file_path) or None)
+        try:
+            self._spill(spill_dir, partitions)
+            duplicates = [self._partition_duplicates(os.path.join(spill_dir, f"{p}.bin"))
+                          for p in range(partitions)]
+        finally:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+        return np.sort(np.concatenate(duplicates)) if duplicates else np.empty(0, dtype=np.int64)
+
+    def _spill(self, spill_dir: str, partitions: int):
+        files = [open(os.path.join(spill_dir, f"{p}.bin"), "wb") for p in range(partitions)]
+        try:
+            offset = 0
+            reader = pd.read_csv(self.file_path, encoding=self.encoding, dtype=str,
+                                 keep_default_na=False, chunksize=self.chunksize)
+            for chunk in reader:
+                records = np.empty(len(chunk), dtype=RECORD)
+                records["hash"] = pd.util.hash_pandas_object(chunk, index=False).to_numpy(dtype=np.uint64)
+                records["row"] = np.arange(offset, offset + len(chunk))
+                offset += len(chunk)
+
+                part = (records["hash"] % np.uint64(partitions)).astype(np.int64)
+                order = np.argsort(part, kind="stable")
+                bounds = np.searchsorted(part[order], np.arange(partitions + 1))
+                for p in range(partitions):
+                    if bounds[p] < bounds[p + 1]:
+                        files[p].write(records[order[bounds[p]:bounds[p + 1]]].tobytes())
+        finally:
+            for f in files:
+                f.close()
+
+    @staticmethod
+    def _partition_duplicates(path: str) -> np.ndarray:
+        records = np.fromfile(path, dtype=RECORD)
+        if len(records) < 2:
+            return np.empty(0, dtype=np.int64)
+        # Sort by fingerprint, then row number, so the first occurrence is kept
+        records = records[np.lexsort((records["row"], records["hash"]))]
+        repeated = records["hash"][1:] == records["hash"][:-1]
+        return records["row"][1:][repeated]
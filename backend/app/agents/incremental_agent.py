@@ -0,0 +1,613 @@
+import os
+import base64
+import hashlib
+import json
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+from app.agents.fingerprint_agent import row_hashes
+from app.agents.visualization_agent import VisualizationAgent, lttb, RESAMPLE_RULES, TIMESERIES_POINTS
+
+SKETCH_SIZE = 256
+HLL_PRECISION = 12
+MAX_TRACKED_VALUES = 1000
+MAX_HASH_RUNS = 8
+HISTOGRAM_BINS = 20
+
+def _encode_state(value):
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__} in analysis state")
+
+def _decode_state(value: Dict[str, Any]):
+    return base64.b64decode(value["__bytes__"]) if set(value) == {"__bytes__"} else value
+
+class IncrementalAgent:
+    def __init__(self, state: Dict[str, Any]):
+        self.state = state
+        self.superseded: List[str] = []
+
+    @classmethod
+    def load(cls, path: str) -> "IncrementalAgent":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f, object_hook=_decode_state))
+
+    def save(self, path: str):
+        # The state lives on disk next to the hash runs: value counts, sketches
+        # and HLL registers grow with the number of columns, which could push
+        # the dataset document past MongoDB's size limit
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self.state, f, default=_encode_state)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def from_frame(cls, cleaned_df: pd.DataFrame, cleaning_report: Dict[str, Any],
+                   file_path: str, encoding: str, hashes: Optional[np.ndarray] = None) -> "IncrementalAgent":
+        numeric_cols = set(cleaned_df.select_dtypes(include=[np.number]).columns)
+        datetime_formats = cleaning_report.get("datetime_columns", {})
+        state = {
+            "file_path": file_path,
+            "encoding": encoding,
+            "columns": list(cleaned_df.columns),
+            "rows": 0,
+            "raw_rows": int(cleaning_report["original_shape"][0]),
+            "duplicates_removed": int(cleaning_report.get("duplicates_removed", 0)),
+            "memory_bytes": 0,
+            "batches": 0,
+            "raw_missing": {col: int(v) for col, v in cleaning_report.get("missing_values", {}).items()},
+            "actions_taken": list(cleaning_report.get("actions_taken", [])),
+            "unparsed": dict(cleaning_report.get("unparsed_dates", {})),
+            "column_stats": {
+                col: {
+                    "kind": "numeric" if col in numeric_cols
+                    else "datetime" if pd.api.types.is_datetime64_any_dtype(cleaned_df[col])
+                    else "categorical",
+                    "dtype": str(cleaned_df[col].dtype),
+                    "format": datetime_formats.get(col),
+                }
+                for col in cleaned_df.columns
+            },
+            "comoments": None,
+            "hash_runs": [],
+            "chart_signatures": {},
+        }
+        agent = cls(state)
+        agent.fold(cleaned_df, hashes)
+        return agent
+
+    def clean_batch(self, raw_df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        columns = self.state["columns"]
+        if set(raw_df.columns) != set(columns):
+            raise ValueError("Appended batch columns do not match the dataset columns")
+
+        df = raw_df[columns].copy()
+        for col in self._columns_of_kind("numeric"):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        # A batch of codes like 123 alone is read as int, so text columns are
+        # cast back to str before hashing and filling to match the history
+        for col in self.text_columns():
+            df[col] = df[col].astype(str).where(df[col].notna())
+        # As in a full analysis, missing values are counted over distinct rows
+        raw_rows = len(df)
+        df = df[~df.duplicated()]
+
+        missing = df.isnull().sum()
+        batch_missing = {col: int(count) for col, count in missing.items() if count > 0}
+        filled = []
+        for col, count in batch_missing.items():
+            fill_value = self._fill_value(col)
+            if fill_value is not None:
+                df[col] = df[col].fillna(fill_value)
+                filled.append(col)
+
+        for col in df.select_dtypes(include=["object"]).columns:
+            df[col] = df[col].str.strip()
+        unparsed = {}
+        for col in self._columns_of_kind("datetime"):
+            parsed = self._parse_dates(col, df[col])
+            coerced = int(parsed.isna().sum() - df[col].isna().sum())
+            if coerced > 0:
+                batch_missing[col] = batch_missing.get(col, 0) + coerced
+                unparsed[col] = coerced
+            df[col] = parsed
+
+        hashes = row_hashes(df)
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        keep &= ~self._seen(hashes)
+        df = df[keep]
+
+        return df, {
+            "row_hashes": hashes[keep],
+            "raw_rows": raw_rows,
+            "missing_values": batch_missing,
+            "filled": filled,
+            "unparsed": unparsed,
+            "duplicates_removed": int(raw_rows - len(df)),
+        }
+
+    def _parse_dates(self, col: str, values: pd.Series) -> pd.Series:
+        # Parsed through UTC and converted to the stored zone, so a batch with
+        # other or mixed offsets still matches the column's dtype
+        stats = self.state["column_stats"][col]
+        tz = getattr(pd.api.types.pandas_dtype(stats["dtype"]), "tz", None)
+        parsed = pd.to_datetime(values, format=stats["format"], errors="coerce", utc=True)
+        return parsed.dt.tz_convert(tz) if tz is not None else parsed.dt.tz_localize(None)
+
+    def record_batch_report(self, report: Dict[str, Any]):
+        state = self.state
+        state["raw_rows"] += report["raw_rows"]
+        state["duplicates_removed"] += report["duplicates_removed"]
+        for col, count in report["missing_values"].items():
+            state["raw_missing"][col] = state["raw_missing"].get(col, 0) + count
+
+        unparsed = state.setdefault("unparsed", {})
+        for col, count in report["unparsed"].items():
+            unparsed[col] = unparsed.get(col, 0) + count
+
+        actions = [a for a in state["actions_taken"]
+                   if not (a.startswith("Removed ") and a.endswith(" duplicates"))
+                   and not (a.startswith("Set ") and a.endswith(" values to missing"))]
+        for col in report["filled"]:
+            method = "median" if state["column_stats"][col]["kind"] == "numeric" else "mode"
+            action = f"Filled {col} with {method}"
+            if action not in actions:
+                actions.append(action)
+        for col, count in unparsed.items():
+            actions.append(f"Set {count} unparseable {col} values to missing")
+        if state["duplicates_removed"] > 0:
+            actions.append(f"Removed {state['duplicates_removed']} duplicates")
+        state["actions_taken"] = actions
+
+    def fold(self, df: pd.DataFrame, hashes: Optional[np.ndarray] = None):
+        state = self.state
+        for col in state["columns"]:
+            stats = state["column_stats"][col]
+            series = df[col]
+            values = series.dropna()
+            stats["count"] = stats.get("count", 0) + int(len(values))
+            stats["nulls"] = stats.get("nulls", 0) + int(len(series) - len(values))
+            stats["hll"] = self._merge_hll(stats.get("hll"), self._hll(values, stats["kind"]))
+            if stats["kind"] == "numeric":
+                self._fold_numeric(stats, values.to_numpy(dtype=np.float64))
+            elif stats["kind"] == "datetime":
+                self._fold_datetime(stats, values)
+            else:
+                self._fold_categorical(stats, values)
+
+        numeric_cols = self._columns_of_kind("numeric")
+        if len(numeric_cols) >= 2:
+            state["comoments"] = self._merge_comoments(
+                state["comoments"], df[numeric_cols].dropna().to_numpy(dtype=np.float64), numeric_cols
+            )
+
+        self._fold_time_series(df)
+
+        state["rows"] += int(len(df))
+        state["memory_bytes"] += int(df.memory_usage(deep=True).sum())
+        self._store_hashes(row_hashes(df) if hashes is None else hashes)
+        state["batches"] += 1
+
+    def _fold_numeric(self, stats: Dict[str, Any], values: np.ndarray):
+        n = len(values)
+        if n == 0:
+            return
+        mean = float(values.mean())
+        d = values - mean
+        batch = {"n": n, "mean": mean, "m2": float((d ** 2).sum()),
+                 "m3": float((d ** 3).sum()), "m4": float((d ** 4).sum())}
+        moments = stats.get("moments")
+        stats["moments"] = batch if not moments or moments["n"] == 0 else self._merge_moments(moments, batch)
+        stats["min"] = float(min(values.min(), stats.get("min", np.inf)))
+        stats["max"] = float(max(values.max(), stats.get("max", -np.inf)))
+        stats["sketch"] = self._merge_sketch(stats.get("sketch", []), self._sketch(values))
+
+    def _fold_datetime(self, stats: Dict[str, Any], values: pd.Series):
+        if values.empty:
+            return
+        low, high = values.min(), values.max()
+        if stats.get("min"):
+            low, high = min(low, pd.Timestamp(stats["min"])), max(high, pd.Timestamp(stats["max"]))
+        stats["min"], stats["max"] = low.isoformat(), high.isoformat()
+
+    def _fold_time_series(self, df: pd.DataFrame):
+        # Time series keep the previous downsampled points, re-run through
+        # LTTB with each batch, and per-bucket sums and counts for the
+        # resampled mean. Buckets are days until the span is too long for a
+        # weekly chart, then months, which still roll up to quarters and years
+        time_cols = self._columns_of_kind("datetime")
+        numeric_cols = self._columns_of_kind("numeric")[:5]
+        if not time_cols or not numeric_cols:
+            return
+        time_stats = self.state["column_stats"][time_cols[0]]
+        if not time_stats.get("min"):
+            return
+        span_days = (self._wall_time(time_stats["max"]) - self._wall_time(time_stats["min"])).total_seconds() / 86400
+        grain = "D" if span_days <= RESAMPLE_RULES[1][2] * TIMESERIES_POINTS else "MS"
+
+        times = df[time_cols[0]]
+        if times.dt.tz is not None:
+            times = times.dt.tz_localize(None)
+        series = self.state.setdefault("time_series", {})
+        for col in numeric_cols:
+            frame = pd.DataFrame({"t": times, "y": df[col]}).dropna()
+            entry = series.get(col) or {"times": [], "values": [], "starts": [], "sums": [], "counts": []}
+
+            t = np.concatenate([np.array(entry["times"], dtype=np.int64),
+                                frame["t"].astype("datetime64[ns]").to_numpy().view(np.int64)])
+            y = np.concatenate([np.array(entry["values"], dtype=np.float64), frame["y"].to_numpy(dtype=np.float64)])
+            order = np.argsort(t, kind="stable")
+            t, y = t[order], y[order]
+            keep = lttb((t - t[0]) / 1e9, y, TIMESERIES_POINTS) if len(t) else order
+            entry["times"], entry["values"] = t[keep].tolist(), y[keep].tolist()
+
+            buckets = pd.concat([
+                pd.DataFrame({"start": pd.to_datetime(np.array(entry["starts"], dtype=np.int64)),
+                              "sum": np.array(entry["sums"], dtype=np.float64),
+                              "count": np.array(entry["counts"], dtype=np.int64)}),
+                pd.DataFrame({"start": frame["t"].dt.floor("D"), "sum": frame["y"], "count": 1}),
+            ], ignore_index=True)
+            if grain == "MS":
+                buckets["start"] = buckets["start"].dt.to_period("M").dt.start_time
+            buckets = buckets.groupby("start")[["sum", "count"]].sum()
+            entry["starts"] = buckets.index.astype("datetime64[ns]").to_numpy().view(np.int64).tolist()
+            entry["sums"], entry["counts"] = buckets["sum"].tolist(), buckets["count"].astype(int).tolist()
+            series[col] = entry
+
+    @staticmethod
+    def _wall_time(value: str) -> pd.Timestamp:
+        stamp = pd.Timestamp(value)
+        return stamp.tz_localize(None) if stamp.tz is not None else stamp
+
+    def _fold_categorical(self, stats: Dict[str, Any], values: pd.Series):
+        counts = stats.get("value_counts", {})
+        for value, count in values.value_counts().items():
+            key = str(value)
+            counts[key] = counts.get(key, 0) + int(count)
+        if len(counts) > MAX_TRACKED_VALUES:
+            counts = dict(sorted(counts.items(), key=lambda kv: kv[1], reverse=True)[:MAX_TRACKED_VALUES])
+            stats["truncated"] = True
+        stats["value_counts"] = counts
+
+    @staticmethod
+    def _merge_moments(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+        # Pairwise update of central moments (Pébay, 2008).
+        na, nb = a["n"], b["n"]
+        n = na + nb
+        delta = b["mean"] - a["mean"]
+        m2 = a["m2"] + b["m2"] + delta ** 2 * na * nb / n
+        m3 = (a["m3"] + b["m3"] + delta ** 3 * na * nb * (na - nb) / n ** 2
+              + 3 * delta * (na * b["m2"] - nb * a["m2"]) / n)
+        m4 = (a["m4"] + b["m4"] + delta ** 4 * na * nb * (na ** 2 - na * nb + nb ** 2) / n ** 3
+              + 6 * delta ** 2 * (na ** 2 * b["m2"] + nb ** 2 * a["m2"]) / n ** 2
+              + 4 * delta * (na * b["m3"] - nb * a["m3"]) / n)
+        return {"n": n, "mean": a["mean"] + delta * nb / n, "m2": m2, "m3": m3, "m4": m4}
+
+    @staticmethod
+    def _merge_comoments(current: Optional[Dict[str, Any]], X: np.ndarray, columns: List[str]) -> Dict[str, Any]:
+        if len(X) == 0:
+            return current
+        mean_b = X.mean(axis=0)
+        d = X - mean_b
+        nb = len(X)
+        c_b = d.T @ d
+        if not current or current["n"] == 0:
+            return {"columns": columns, "n": nb, "mean": mean_b.tolist(), "c": c_b.tolist()}
+        na = current["n"]
+        mean_a = np.array(current["mean"])
+        n = na + nb
+        delta = mean_b - mean_a
+        c = np.array(current["c"]) + c_b + np.outer(delta, delta) * na * nb / n
+        return {"columns": columns, "n": n, "mean": (mean_a + delta * nb / n).tolist(), "c": c.tolist()}
+
+    @staticmethod
+    def _compress(centroids: np.ndarray) -> List[List[float]]:
+        # Merging t-digest with the k1 scale function: a centroid may only
+        # span one unit of k(q) = d/(2*pi) * asin(2q - 1), which is steep near
+        # q = 0 and q = 1, so tail centroids stay singletons or close to it and
+        # the IQR fences and the counts beyond them are read off real values.
+        centroids = centroids[np.argsort(centroids[:, 0], kind="stable")]
+        means, weights = centroids[:, 0], centroids[:, 1]
+        q = (np.cumsum(weights) - weights / 2) / weights.sum()
+        # k spans compression / 2 units, so this keeps about SKETCH_SIZE centroids
+        k = (2 * SKETCH_SIZE) / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1.0, 1.0))
+        bucket = np.floor(k).astype(np.int64)
+        bucket -= bucket.min()
+        merged_w = np.bincount(bucket, weights=weights)
+        merged_m = np.bincount(bucket, weights=means * weights)
+        mask = merged_w > 0
+        return np.column_stack([merged_m[mask] / merged_w[mask], merged_w[mask]]).tolist()
+
+    @classmethod
+    def _sketch(cls, values: np.ndarray) -> List[List[float]]:
+        return cls._compress(np.column_stack([values, np.ones(len(values))]))
+
+    @classmethod
+    def _merge_sketch(cls, a: List[List[float]], b: List[List[float]]) -> List[List[float]]:
+        return cls._compress(np.array(a + b, dtype=np.float64).reshape(-1, 2))
+
+    @staticmethod
+    def _sketch_curve(stats: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        centroids = np.array(stats["sketch"], dtype=np.float64).reshape(-1, 2)
+        weights = centroids[:, 1]
+        ranks = np.cumsum(weights) - weights / 2
+        xs = np.concatenate([[stats["min"]], centroids[:, 0], [stats["max"]]])
+        ys = np.concatenate([[0.0], ranks, [weights.sum()]])
+        return xs, ys
+
+    def quantile(self, col: str, q: float) -> Optional[float]:
+        stats = self.state["column_stats"][col]
+        if not stats.get("sketch"):
+            return None
+        xs, ys = self._sketch_curve(stats)
+        return float(np.interp(q * ys[-1], ys, xs))
+
+    def _cdf(self, col: str, x: np.ndarray) -> np.ndarray:
+        xs, ys = self._sketch_curve(self.state["column_stats"][col])
+        return np.interp(x, xs, ys)
+
+    @staticmethod
+    def _hll(values: pd.Series, kind: str) -> bytes:
+        registers = np.zeros(1 << HLL_PRECISION, dtype=np.uint8)
+        if len(values):
+            values = values.astype("float64") if kind == "numeric" else values.astype(str)
+            hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+            idx = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.int64)
+            rest = hashes & np.uint64((1 << (64 - HLL_PRECISION)) - 1)
+            # frexp gives the bit length of each remainder exactly (< 2**53).
+            _, bit_length = np.frexp(rest.astype(np.float64))
+            rank = (64 - HLL_PRECISION + 1 - bit_length).astype(np.uint8)
+            np.maximum.at(registers, idx, rank)
+        return registers.tobytes()
+
+    @staticmethod
+    def _merge_hll(a: Optional[bytes], b: bytes) -> bytes:
+        if not a:
+            return b
+        return np.maximum(np.frombuffer(a, dtype=np.uint8), np.frombuffer(b, dtype=np.uint8)).tobytes()
+
+    @staticmethod
+    def _hll_estimate(registers: bytes) -> int:
+        regs = np.frombuffer(registers, dtype=np.uint8).astype(np.float64)
+        m = len(regs)
+        estimate = 0.7213 / (1 + 1.079 / m) * m ** 2 / np.sum(2.0 ** -regs)
+        zeros = int((regs == 0).sum())
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def _seen(self, hashes: np.ndarray) -> np.ndarray:
+        seen = np.zeros(len(hashes), dtype=bool)
+        for path in self.state["hash_runs"]:
+            run = np.load(path, mmap_mode="r")
+            if len(run) == 0:
+                continue
+            pos = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            seen |= run[pos] == hashes
+        return seen
+
+    def _store_hashes(self, hashes: np.ndarray):
+        # Each batch writes its own sorted run so lookups stay proportional to
+        # the batch; runs are compacted once there are too many of them. Runs
+        # that were compacted away are only deleted by the caller once the new
+        # state has been committed.
+        state = self.state
+        runs = state["hash_runs"]
+        path = f"{state['file_path']}.rows.{state['batches']}.npy"
+        if len(runs) >= MAX_HASH_RUNS:
+            hashes = np.concatenate([hashes] + [np.load(p) for p in runs])
+            self.superseded.extend(runs)
+            runs = []
+        np.save(path, np.unique(hashes))
+        state["hash_runs"] = runs + [path]
+
+    def text_columns(self) -> List[str]:
+        return [c for c in self._columns_of_kind("categorical") if self.state["column_stats"][c]["dtype"] == "object"]
+
+    def _columns_of_kind(self, kind: str) -> List[str]:
+        return [c for c in self.state["columns"] if self.state["column_stats"][c]["kind"] == kind]
+
+    def _fill_value(self, col: str):
+        stats = self.state["column_stats"][col]
+        if stats["kind"] == "numeric":
+            return self.quantile(col, 0.5)
+        if stats["kind"] == "datetime":
+            return None
+        counts = stats.get("value_counts") or {}
+        return max(counts, key=counts.get) if counts else None
+
+    def _unique_values(self, col: str) -> int:
+        stats = self.state["column_stats"][col]
+        if stats["kind"] == "categorical" and not stats.get("truncated"):
+            return len(stats.get("value_counts", {}))
+        return self._hll_estimate(stats["hll"]) if stats.get("count") else 0
+
+    def _numeric_summary(self, col: str) -> Dict[str, Any]:
+        stats = self.state["column_stats"][col]
+        moments = stats.get("moments")
+        if not moments:
+            return {}
+        n = moments["n"]
+        m2 = moments["m2"]
+        std = float(np.sqrt(m2 / (n - 1))) if n > 1 else None
+        # Bias-corrected estimators, matching pandas Series.skew/kurtosis.
+        skew = kurt = None
+        if n > 2 and m2 > 0:
+            g1 = np.sqrt(n) * moments["m3"] / m2 ** 1.5
+            skew = float(g1 * np.sqrt(n * (n - 1)) / (n - 2))
+        if n > 3 and m2 > 0:
+            g2 = n * moments["m4"] / m2 ** 2 - 3
+            kurt = float(((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3)))
+        return {
+            "count": float(n), "mean": moments["mean"], "std": std, "min": stats["min"],
+            "25%": self.quantile(col, 0.25), "50%": self.quantile(col, 0.5),
+            "75%": self.quantile(col, 0.75), "max": stats["max"],
+            "skewness": skew, "kurtosis": kurt,
+        }
+
+    def _correlation(self) -> Dict[str, Any]:
+        comoments = self.state.get("comoments")
+        if not comoments or comoments["n"] < 2:
+            return {}
+        c = np.array(comoments["c"])
+        std = np.sqrt(np.diag(c))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.clip(c / np.outer(std, std), -1.0, 1.0)
+        cols = comoments["columns"]
+        return {a: {b: float(corr[i, j]) if np.isfinite(corr[i, j]) else None for j, b in enumerate(cols)}
+                for i, a in enumerate(cols)}
+
+    def _outliers(self, col: str) -> int:
+        q1, q3 = self.quantile(col, 0.25), self.quantile(col, 0.75)
+        if q1 is None:
+            return 0
+        iqr = q3 - q1
+        stats = self.state["column_stats"][col]
+        below, above = self._cdf(col, np.array([q1 - 1.5 * iqr, q3 + 1.5 * iqr]))
+        return int(round(below + (stats["count"] - above)))
+
+    def cleaning_report(self) -> Dict[str, Any]:
+        state = self.state
+        outliers = {}
+        for col in self._columns_of_kind("numeric"):
+            count = self._outliers(col)
+            if count > 0:
+                outliers[col] = count
+        return {
+            "original_shape": [state["raw_rows"], len(state["columns"])],
+            "missing_values": {col: v for col, v in state["raw_missing"].items() if v > 0},
+            "duplicates_removed": state["duplicates_removed"],
+            "outliers_detected": outliers,
+            "data_types_fixed": [],
+            "unparsed_dates": dict(state.get("unparsed", {})),
+            "actions_taken": list(state["actions_taken"]),
+            "final_shape": [state["rows"], len(state["columns"])],
+        }
+
+    def eda_results(self) -> Dict[str, Any]:
+        state = self.state
+        numeric_cols = self._columns_of_kind("numeric")
+        summary_statistics = {}
+        column_analysis = {}
+        for col in state["columns"]:
+            stats = state["column_stats"][col]
+            col_data = {
+                "dtype": stats["dtype"],
+                "unique_values": self._unique_values(col),
+                "missing_count": stats.get("nulls", 0),
+            }
+            if stats["kind"] == "numeric":
+                summary = self._numeric_summary(col)
+                if summary:
+                    summary_statistics[col] = {k: summary[k] for k in
+                                               ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]}
+                    if stats["dtype"] in ["float64", "int64"]:
+                        col_data["skewness"] = summary["skewness"]
+                        col_data["kurtosis"] = summary["kurtosis"]
+                        col_data["mean"] = summary["mean"]
+                        col_data["median"] = summary["50%"]
+            elif stats["kind"] == "datetime":
+                col_data["min"] = stats.get("min")
+                col_data["max"] = stats.get("max")
+            else:
+                top = sorted(stats.get("value_counts", {}).items(), key=lambda kv: kv[1], reverse=True)[:5]
+                col_data["top_values"] = dict(top)
+            column_analysis[col] = col_data
+
+        total_nulls = sum(state["column_stats"][c].get("nulls", 0) for c in state["columns"])
+        cells = state["rows"] * len(state["columns"])
+        return {
+            "overview": {
+                "rows": state["rows"],
+                "columns": len(state["columns"]),
+                "column_names": list(state["columns"]),
+                "memory_usage": f"{state['memory_bytes'] / 1024**2:.2f} MB",
+            },
+            "summary_statistics": summary_statistics,
+            "correlation_matrix": self._correlation() if len(numeric_cols) >= 2 else {},
+            "column_analysis": column_analysis,
+            "data_quality": {
+                "completeness": float((1 - total_nulls / cells) * 100) if cells else 0.0,
+                "duplicate_rows": state["duplicates_removed"],
+                "numeric_columns": len(numeric_cols),
+                "categorical_columns": sum(1 for c in state["columns"]
+                                           if state["column_stats"][c]["dtype"] == "object"),
+                "datetime_columns": len(self._columns_of_kind("datetime")),
+            },
+        }
+
+    def chart_inputs(self) -> List[Dict[str, Any]]:
+        # Mirrors the chart selection of VisualizationAgent, but expressed in
+        # terms of the mergeable state so charts never need the full history.
+        numeric_cols = self._columns_of_kind("numeric")
+        categorical_cols = [c for c in self.state["columns"] if self.state["column_stats"][c]["dtype"] == "object"]
+        charts = []
+
+        for col in numeric_cols[:5]:
+            stats = self.state["column_stats"][col]
+            if not stats.get("count"):
+                continue
+            edges = np.linspace(stats["min"], stats["max"], HISTOGRAM_BINS + 1)
+            counts = np.diff(self._cdf(col, edges)) if stats["max"] > stats["min"] else np.array([stats["count"]])
+            charts.append({"type": "histogram", "column": col, "inputs": {
+                "edges": [round(float(e), 6) for e in edges], "counts": [int(round(c)) for c in counts]}})
+
+        for col in numeric_cols[:5]:
+            stats = self.state["column_stats"][col]
+            if not stats.get("count"):
+                continue
+            q1, median, q3 = (self.quantile(col, q) for q in (0.25, 0.5, 0.75))
+            iqr = q3 - q1
+            charts.append({"type": "boxplot", "column": col, "inputs": {
+                "q1": round(q1, 6), "median": round(median, 6), "q3": round(q3, 6),
+                "lowerfence": round(max(stats["min"], q1 - 1.5 * iqr), 6),
+                "upperfence": round(min(stats["max"], q3 + 1.5 * iqr), 6)}})
+
+        if len(numeric_cols) >= 2:
+            corr = self._correlation()
+            charts.append({"type": "heatmap", "column": "correlation", "inputs": {
+                "columns": list(corr.keys()),
+                "values": [[None if v is None else round(v, 2) for v in row.values()] for row in corr.values()]}})
+
+        for col in categorical_cols[:3]:
+            counts = self.state["column_stats"][col].get("value_counts", {})
+            top = sorted(counts.items(), key=lambda kv: kv[1], reverse=True)[:10]
+            charts.append({"type": "bar", "column": col, "inputs": {
+                "labels": [k for k, _ in top], "counts": [v for _, v in top]}})
+
+        charts.extend(self._time_series_inputs())
+        return charts
+
+    def _time_series_inputs(self) -> List[Dict[str, Any]]:
+        series = self.state.get("time_series")
+        if not series:
+            return []
+        time_col = self._columns_of_kind("datetime")[0]
+        time_stats = self.state["column_stats"][time_col]
+        rule, label = VisualizationAgent._resample_rule(self._wall_time(time_stats["min"]),
+                                                        self._wall_time(time_stats["max"]))
+        charts = []
+        for col in self._columns_of_kind("numeric")[:5]:
+            entry = series.get(col)
+            if not entry or len(entry["times"]) < 2:
+                continue
+            inputs = {"time_column": time_col, "x": self._isoformat(entry["times"]), "y": entry["values"]}
+            if rule:
+                index = pd.to_datetime(np.array(entry["starts"], dtype=np.int64))
+                sums = pd.Series(entry["sums"], index=index).resample(rule).sum()
+                counts = pd.Series(entry["counts"], index=index).resample(rule).sum()
+                means = (sums / counts)[counts > 0]
+                inputs.update(label=label, bucket_x=self._isoformat(means.index.astype("datetime64[ns]").to_numpy().view(np.int64)),
+                              bucket_y=[round(float(v), 6) for v in means])
+            charts.append({"type": "timeseries", "column": col, "inputs": inputs})
+        return charts
+
+    @staticmethod
+    def _isoformat(stamps) -> List[str]:
+        return [stamp.isoformat() for stamp in pd.to_datetime(np.asarray(stamps, dtype=np.int64))]
+
+    @staticmethod
+    def signature(chart: Dict[str, Any]) -> str:
+        payload = json.dumps(chart["inputs"], sort_keys=True)
+        return hashlib.md5(payload.encode("utf-8")).hexdigest()
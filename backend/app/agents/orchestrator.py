@@ -1,40 +1,110 @@
+import os
+import shutil
 import pandas as pd
-from typing import Dict, Any
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
 from app.agents.cleaning_agent import DataCleaningAgent
 from app.agents.eda_agent import EDAAgent
-from app.agents.visualization_agent import VisualizationAgent
+from app.agents.visualization_agent import VisualizationAgent, StateVisualizationAgent
 from app.agents.insight_agent import InsightAgent
+from app.agents.incremental_agent import IncrementalAgent
+from app.agents.fingerprint_agent import FingerprintAgent
+from app.core.config import settings
+
+FINGERPRINT_CHUNK_ROWS = 100_000
+
+def read_csv(path: str, encoding: str = 'utf-8', dtype=None) -> Tuple[pd.DataFrame, str]:
+    try:
+        return pd.read_csv(path, encoding=encoding, dtype=dtype), encoding
+    except UnicodeDecodeError:
+        return pd.read_csv(path, encoding='latin-1', dtype=dtype), 'latin-1'
 
 class OrchestratorAgent:
     def __init__(self, file_path: str):
         self.file_path = file_path
         self.df = None
-    
+        self.encoding = 'utf-8'
+        self.state_path: Optional[str] = None
+        self.prior_duplicates = 0
+        self.cleaned_path = f"{file_path}.cleaned"
+        self.cleaned_parts: Optional[int] = None
+        self.superseded: List[str] = []
+
+    def _read_csv(self, path: str, dtype=None) -> pd.DataFrame:
+        df, self.encoding = read_csv(path, self.encoding, dtype)
+        return df
+
+    def _load_deduplicated(self) -> pd.DataFrame:
+        # Repeated rows are dropped before cleaning on both paths, so missing
+        # value counts and fill values always describe the distinct rows. The
+        # large-file pass only removes textual repeats, which keeps the first
+        # row of every group, so this gives the same rows either way.
+        df = self._load_rows()
+        duplicated = df.duplicated()
+        self.prior_duplicates += int(duplicated.sum())
+        return df[~duplicated].reset_index(drop=True)
+
+    def _load_rows(self) -> pd.DataFrame:
+        limit = settings.FINGERPRINT_MEMORY_LIMIT_MB * 1024**2
+        if os.path.getsize(self.file_path) <= limit:
+            return self._read_csv(self.file_path)
+
+        # Files larger than the limit first find exact textual duplicate lines
+        # with a disk-spilling fingerprint pass, so repeated rows are skipped
+        # while loading. This only prunes duplicates: every unique row is still
+        # loaded into memory, and cleaning hashes the typed rows again since
+        # normalisation (fills, whitespace, dates) can create new duplicates.
+        try:
+            duplicates = FingerprintAgent(self.file_path, self.encoding, limit, FINGERPRINT_CHUNK_ROWS).find_duplicate_rows()
+        except UnicodeDecodeError:
+            self.encoding = 'latin-1'
+            duplicates = FingerprintAgent(self.file_path, self.encoding, limit, FINGERPRINT_CHUNK_ROWS).find_duplicate_rows()
+        self.prior_duplicates = int(len(duplicates))
+
+        chunks = []
+        offset = 0
+        for chunk in pd.read_csv(self.file_path, encoding=self.encoding, chunksize=FINGERPRINT_CHUNK_ROWS):
+            rows = np.arange(offset, offset + len(chunk))
+            offset += len(chunk)
+            chunks.append(chunk[~np.isin(rows, duplicates, assume_unique=True)])
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
     async def run_analysis(self) -> Dict[str, Any]:
         try:
             # Load data
-            self.df = pd.read_csv(self.file_path, encoding='utf-8')
-        except UnicodeDecodeError:
-            self.df = pd.read_csv(self.file_path, encoding='latin-1')
+            self.df = self._load_deduplicated()
         except Exception as e:
             return {"error": f"Failed to load CSV: {str(e)}"}
-        
+
         # Data Cleaning
-        cleaning_agent = DataCleaningAgent(self.df)
+        cleaning_agent = DataCleaningAgent(self.df, self.prior_duplicates)
         cleaned_df, cleaning_report = cleaning_agent.clean()
-        
+        self._write_cleaned(cleaned_df, 0, reset=True)
+
         # EDA
-        eda_agent = EDAAgent(cleaned_df)
+        eda_agent = EDAAgent(cleaned_df, cleaning_report["duplicates_removed"])
         eda_results = eda_agent.analyze()
-        
+
         # Visualizations
         viz_agent = VisualizationAgent(cleaned_df)
         visualizations = viz_agent.generate_visualizations()
-        
+
         # AI Insights
         insight_agent = InsightAgent()
         ai_insights = insight_agent.generate_insights(cleaning_report, eda_results)
-        
+
+        # Mergeable state for later appends
+        incremental_agent = IncrementalAgent.from_frame(
+            cleaned_df, cleaning_report, self.file_path, self.encoding, cleaning_agent.row_hashes
+        )
+        incremental_agent.state["chart_signatures"] = {
+            f"{chart['type']}:{chart['column']}": IncrementalAgent.signature(chart)
+            for chart in incremental_agent.chart_inputs()
+        }
+        incremental_agent.state["cleaned_parts"] = self.cleaned_parts = 1
+        incremental_agent.state["raw_bytes"] = os.path.getsize(self.file_path)
+        self._save_state(incremental_agent)
+
         return {
             "status": "completed",
             "cleaning_report": cleaning_report,
@@ -42,3 +112,104 @@ class OrchestratorAgent:
             "visualizations": visualizations,
             "ai_insights": ai_insights
         }
+
+    async def run_append(self, batch_path: str, state_path: str,
+                         previous: Dict[str, Any]) -> Dict[str, Any]:
+        # Nothing the committed state refers to is modified here: new files are
+        # written next to it and the old ones are only listed in superseded,
+        # for the caller to remove once the new state_path has been stored
+        incremental_agent = IncrementalAgent.load(state_path)
+        state = incremental_agent.state
+        self.encoding = state.get("encoding", self.encoding)
+        raw_batch = self._read_csv(batch_path, {col: str for col in incremental_agent.text_columns()})
+
+        # Clean and fold only the new rows into the stored state
+        batch = state["batches"]
+        cleaned_batch, batch_report = incremental_agent.clean_batch(raw_batch)
+        incremental_agent.record_batch_report(batch_report)
+        incremental_agent.fold(cleaned_batch, batch_report["row_hashes"])
+        # Cleaned parts are only extended while every earlier batch has one;
+        # otherwise a download would hold just the appended rows
+        if state.get("cleaned_parts") == batch and os.path.exists(self._part_path(0)):
+            self._write_cleaned(cleaned_batch, batch)
+            state["cleaned_parts"] = self.cleaned_parts = batch + 1
+        else:
+            state["cleaned_parts"] = None
+
+        cleaning_report = incremental_agent.cleaning_report()
+        eda_results = incremental_agent.eda_results()
+
+        # Re-render only the charts whose inputs changed
+        existing = {f"{v['type']}:{v['column']}": v for v in previous.get("visualizations") or []}
+        signatures = state.get("chart_signatures", {})
+        renderer = StateVisualizationAgent()
+        visualizations = []
+        for chart in incremental_agent.chart_inputs():
+            key = f"{chart['type']}:{chart['column']}"
+            signature = IncrementalAgent.signature(chart)
+            if key in existing and signatures.get(key) == signature:
+                visualizations.append(existing[key])
+            else:
+                visualizations.append(renderer.render(chart))
+                signatures[key] = signature
+        state["chart_signatures"] = signatures
+
+        insight_agent = InsightAgent()
+        ai_insights = insight_agent.generate_insights(cleaning_report, eda_results)
+
+        self._append_raw_rows(raw_batch[state["columns"]], state)
+        self._save_state(incremental_agent)
+        self.superseded = incremental_agent.superseded + [state_path]
+
+        return {
+            "status": "completed",
+            "cleaning_report": cleaning_report,
+            "eda_results": eda_results,
+            "visualizations": visualizations,
+            "ai_insights": ai_insights
+        }
+
+    def _save_state(self, incremental_agent: IncrementalAgent):
+        self.state_path = f"{self.file_path}.state.{incremental_agent.state['batches']}.json"
+        incremental_agent.save(self.state_path)
+
+    def discard_superseded(self):
+        for path in self.superseded:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _part_path(self, part: int) -> str:
+        return os.path.join(self.cleaned_path, f"part-{part:05d}.parquet")
+
+    def _write_cleaned(self, df: pd.DataFrame, part: int, reset: bool = False):
+        # Each append adds one Parquet part, so rows that were already
+        # cleaned are never rewritten; a full analysis starts over. Parts are
+        # numbered by batch, so a retried append overwrites its own part and
+        # readers only use the first cleaned_parts of them
+        if reset:
+            shutil.rmtree(self.cleaned_path, ignore_errors=True)
+            shutil.rmtree(f"{self.cleaned_path}.exports", ignore_errors=True)
+        os.makedirs(self.cleaned_path, exist_ok=True)
+        path = self._part_path(part)
+        out = df.copy()
+        for col in out.select_dtypes(include=['object']).columns:
+            out[col] = out[col].astype('string')
+        out.to_parquet(f"{path}.tmp", index=False, row_group_size=settings.CLEANED_ROW_GROUP_ROWS)
+        os.replace(f"{path}.tmp", path)
+
+    def _append_raw_rows(self, batch: pd.DataFrame, state: Dict[str, Any]):
+        # Bytes past the committed size were left by an append that never
+        # committed its state
+        committed = state.get("raw_bytes")
+        if committed is not None and os.path.getsize(self.file_path) > committed:
+            os.truncate(self.file_path, committed)
+        needs_newline = False
+        if os.path.getsize(self.file_path) > 0:
+            with open(self.file_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+        with open(self.file_path, 'a', encoding=self.encoding, newline='') as f:
+            if needs_newline:
+                f.write('\n')
+            batch.to_csv(f, header=False, index=False)
+        state["raw_bytes"] = os.path.getsize(self.file_path)
@@ -0,0 +1,240 @@
+import re
+import json
+import time
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+AGGREGATIONS = ["count", "sum", "mean", "median", "min", "max", "nunique", "std"]
+
+QUESTION_AGGREGATIONS = {
+    "average": "mean", "avg": "mean", "mean": "mean",
+    "total": "sum", "sum": "sum", "median": "median",
+    "maximum": "max", "max": "max", "highest": "max", "largest": "max",
+    "minimum": "min", "min": "min", "lowest": "min", "smallest": "min",
+}
+# Words that can surround "<aggregate> <column> [by <column>]" without
+# changing what is asked
+QUESTION_FILLER = {
+    "what", "whats", "s", "is", "are", "was", "were", "the", "a", "an", "of", "our", "my", "me",
+    "show", "give", "tell", "please", "value", "overall", "by", "per", "for", "each", "across", "top", "bottom",
+}
+
+class QueryAgent:
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    @staticmethod
+    def required_columns(spec: Dict[str, Any], columns: List[str]) -> List[str]:
+        aggregations = spec.get("aggregations", [])
+        needed = (
+            [f["column"] for f in spec.get("filters", [])]
+            + spec.get("group_by", [])
+            + [a["column"] for a in aggregations if a.get("column")]
+            + (spec.get("columns") or ([] if aggregations else list(columns)))
+        )
+        order_by = spec.get("order_by")
+        if order_by and order_by["column"] in columns:
+            needed.append(order_by["column"])
+        unknown = [c for c in needed if c not in columns]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        # A plain row count still needs one column to know how many rows there are
+        return [c for c in columns if c in needed] or list(columns[:1])
+
+    def run(self, spec: Dict[str, Any], max_result_rows: int, deadline: Optional[float] = None) -> Dict[str, Any]:
+        df = self.df
+        self._check_columns(
+            [f["column"] for f in spec.get("filters", [])]
+            + spec.get("group_by", [])
+            + [a["column"] for a in spec.get("aggregations", []) if a.get("column")]
+            + spec.get("columns", [])
+        )
+
+        mask = self._filter_mask(spec.get("filters", []))
+        if mask is not None:
+            df = df[mask]
+        scanned = int(len(df))
+        self._check_deadline(deadline)
+
+        result = self._aggregate(df, spec) if spec.get("aggregations") else self._project(df, spec)
+        self._check_deadline(deadline)
+
+        order_by = spec.get("order_by")
+        limit = spec.get("limit")
+        limit = max_result_rows if limit is None else max(1, min(int(limit), max_result_rows))
+        if order_by:
+            if order_by["column"] not in result.columns:
+                raise ValueError(f"Unknown order_by column: {order_by['column']}")
+            result = self._top_n(result, order_by["column"], limit, order_by.get("descending", True))
+        truncated = len(result) > limit
+        result = result.head(limit)
+
+        return {
+            "columns": [str(c) for c in result.columns],
+            "rows": json.loads(result.to_json(orient="values", date_format="iso")),
+            "row_count": int(len(result)),
+            "rows_scanned": scanned,
+            "truncated": truncated
+        }
+
+    @staticmethod
+    def _check_deadline(deadline: Optional[float]):
+        # Checked between stages; a stage that is already running is not interrupted
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError("Query exceeded its time budget")
+
+    def _check_columns(self, columns: List[str]):
+        unknown = [c for c in columns if c not in self.df.columns]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+    def _filter_mask(self, filters: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        mask = None
+        for f in filters:
+            col = self.df[f["column"]]
+            op, value = f["op"], f.get("value")
+            if op == "in":
+                value = [self._coerce(col, v) for v in (value if isinstance(value, list) else [value])]
+            elif op != "contains":
+                value = self._coerce(col, value)
+            if op == "eq":
+                cond = col == value
+            elif op == "ne":
+                cond = col != value
+            elif op == "gt":
+                cond = col > value
+            elif op == "gte":
+                cond = col >= value
+            elif op == "lt":
+                cond = col < value
+            elif op == "lte":
+                cond = col <= value
+            elif op == "in":
+                cond = col.isin(value)
+            elif op == "contains":
+                cond = col.astype(str).str.contains(str(value), case=False, regex=False)
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            cond = cond.to_numpy(dtype=bool, na_value=False)
+            mask = cond if mask is None else mask & cond
+        return mask
+
+    @staticmethod
+    def _coerce(col: pd.Series, value: Any) -> Any:
+        # Filter values arrive as JSON, so they are converted to the column's
+        # type up front instead of failing inside the comparison
+        if value is None:
+            return value
+        try:
+            if pd.api.types.is_bool_dtype(col) and isinstance(value, bool):
+                return value
+            if pd.api.types.is_numeric_dtype(col):
+                return float(value)
+            if pd.api.types.is_datetime64_any_dtype(col):
+                return pd.Timestamp(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Filter value {value!r} does not match the type of column '{col.name}'")
+        return str(value)
+
+    def _aggregate(self, df: pd.DataFrame, spec: Dict[str, Any]) -> pd.DataFrame:
+        named = {}
+        for agg in spec["aggregations"]:
+            func, col = agg["func"], agg.get("column")
+            if func not in AGGREGATIONS:
+                raise ValueError(f"Unsupported aggregation: {func}")
+            if func != "count" and not col:
+                raise ValueError(f"Aggregation '{func}' requires a column")
+            if func not in ("count", "nunique", "min", "max") and not pd.api.types.is_numeric_dtype(df[col]):
+                raise ValueError(f"Aggregation '{func}' requires a numeric column, '{col}' is not numeric")
+            alias = agg.get("alias") or (f"{func}_{col}" if col else "count")
+            named[alias] = (col, func)
+
+        group_by = spec.get("group_by", [])
+        if group_by:
+            grouped = df.groupby(group_by, dropna=False, sort=False)
+            parts = []
+            for alias, (col, func) in named.items():
+                series = grouped.size() if col is None else grouped[col].agg(func)
+                parts.append(series.rename(alias))
+            return pd.concat(parts, axis=1).reset_index()
+
+        row = {}
+        for alias, (col, func) in named.items():
+            row[alias] = len(df) if col is None else df[col].agg(func)
+        return pd.DataFrame([row])
+
+    def _project(self, df: pd.DataFrame, spec: Dict[str, Any]) -> pd.DataFrame:
+        columns = spec.get("columns") or list(df.columns)
+        return df[columns]
+
+    def _top_n(self, df: pd.DataFrame, column: str, n: int, descending: bool) -> pd.DataFrame:
+        # nlargest/nsmallest select the top rows without sorting everything
+        if pd.api.types.is_numeric_dtype(df[column]):
+            return df.nlargest(n + 1, column) if descending else df.nsmallest(n + 1, column)
+        return df.sort_values(column, ascending=not descending).head(n + 1)
+
+    @staticmethod
+    def parse_question(question: str, dtypes: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        # Only plain "<aggregate> <numeric column> [by <column>]" questions are
+        # answered locally; any other word means something else is asked
+        # ("how many columns", "correlation with") and the LLM handles it.
+        text = re.sub(r"[_\-]+", " ", question.lower())
+        rest = text
+        positions = {}
+        for col in dtypes:
+            # Prefer the full column name, then any distinctive word of it
+            # ("revenue" for "total_revenue"); a word shared by two columns
+            # mentions both, which makes the question ambiguous.
+            name = re.sub(r"[_\-\s]+", " ", str(col).lower()).strip()
+            words = [name] + [w for w in name.split(" ") if len(w) > 2 and w not in QUESTION_AGGREGATIONS]
+            for word in words:
+                match = re.search(rf"\b{re.escape(word)}s?\b", text)
+                if match:
+                    positions[col] = match.start()
+                    rest = rest[:match.start()] + " " * (match.end() - match.start()) + rest[match.end():]
+                    break
+
+        top = re.search(r"\b(top|bottom)\s+(\d+)\b", rest)
+        words = re.findall(r"[a-z0-9]+", rest[:top.start(2)] + rest[top.end(2):] if top else rest)
+        funcs = {QUESTION_AGGREGATIONS[w] for w in words if w in QUESTION_AGGREGATIONS}
+        if len(funcs) != 1 or set(words) - QUESTION_FILLER - set(QUESTION_AGGREGATIONS):
+            return None
+        func = funcs.pop()
+
+        group_match = re.search(r"\b(by|per|for each|across)\b", rest)
+        group_by = [col for col, pos in positions.items() if group_match and pos > group_match.start()]
+        metrics = [col for col in positions if col not in group_by]
+        if len(metrics) != 1 or len(group_by) > 1 or (group_match and not group_by):
+            return None
+        try:
+            if not pd.api.types.is_numeric_dtype(dtypes[metrics[0]]):
+                return None
+        except TypeError:
+            return None
+
+        spec = {"group_by": group_by, "aggregations": [{"func": func, "column": metrics[0]}]}
+        if group_by:
+            spec["order_by"] = {"column": f"{func}_{metrics[0]}", "descending": "bottom" not in words}
+            spec["limit"] = int(top.group(2)) if top else 10
+        return spec
+
+    @staticmethod
+    def describe_result(spec: Dict[str, Any], result: Dict[str, Any]) -> str:
+        agg = spec["aggregations"][0]
+        label = {"mean": "average", "sum": "total"}.get(agg["func"], agg["func"])
+        subject = f"{label} of {agg['column']}"
+
+        def fmt(value) -> str:
+            if isinstance(value, float):
+                return f"{value:,.2f}"
+            if isinstance(value, int):
+                return f"{value:,}"
+            return str(value)
+
+        if not spec.get("group_by"):
+            return f"The {subject} is {fmt(result['rows'][0][0])}."
+
+        lines = [f"- {row[0]}: {fmt(row[-1])}" for row in result["rows"]]
+        more = " (showing the first groups only)" if result["truncated"] else ""
+        return f"The {subject} by {spec['group_by'][0]}{more}:\n" + "\n".join(lines)
@@ -2,7 +2,34 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+TIMESERIES_POINTS = 1000
+RESAMPLE_RULES = [("D", "Daily", 1), ("W", "Weekly", 7), ("MS", "Monthly", 30.44),
+                  ("QS", "Quarterly", 91.31), ("YS", "Yearly", 365.25)]
+
+# Largest-Triangle-Three-Buckets: picks the indices of n_out points that keep
+# the visual shape of (x, y), so long series stay small on the wire.
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Twice the triangle area formed with the last selected point and the
+        # average of the next bucket; the sign is irrelevant.
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
 
 class VisualizationAgent:
     def __init__(self, df: pd.DataFrame):
@@ -24,8 +51,17 @@ class VisualizationAgent:
         if len(categorical_cols) > 0:
             visualizations.extend(self._create_bar_charts(categorical_cols[:3]))
         
+        visualizations.extend(self.generate_time_series())
+        
         return visualizations
     
+    def generate_time_series(self) -> List[Dict[str, Any]]:
+        numeric_cols = self.df.select_dtypes(include=[np.number]).columns.tolist()
+        datetime_cols = self.df.select_dtypes(include=['datetime', 'datetimetz']).columns.tolist()
+        if len(datetime_cols) > 0 and len(numeric_cols) > 0:
+            return self._create_time_series(datetime_cols[0], numeric_cols[:5])
+        return []
+    
     def _create_histograms(self, columns: List[str]) -> List[Dict[str, Any]]:
         charts = []
         for col in columns:
@@ -60,6 +96,47 @@ class VisualizationAgent:
             "data": fig.to_json()
         }
     
+    def _create_time_series(self, time_col: str, columns: List[str]) -> List[Dict[str, Any]]:
+        charts = []
+        frame = self.df[[time_col] + columns].dropna(subset=[time_col]).sort_values(time_col)
+        if len(frame) < 2:
+            return charts
+        
+        times = frame[time_col]
+        seconds = (times - times.iloc[0]).dt.total_seconds().to_numpy()
+        rule, label = self._resample_rule(times.iloc[0], times.iloc[-1])
+        
+        for col in columns:
+            valid = frame[col].notna().to_numpy()
+            if valid.sum() < 2:
+                continue
+            x, y = seconds[valid], frame[col].to_numpy(dtype=np.float64)[valid]
+            keep = lttb(x, y, TIMESERIES_POINTS)
+            
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=times.to_numpy()[valid][keep], y=y[keep], mode="lines",
+                                     name=col, line={"width": 1}, opacity=0.6))
+            if rule:
+                resampled = frame.set_index(time_col)[col].resample(rule).mean().dropna()
+                fig.add_trace(go.Scatter(x=resampled.index, y=resampled.to_numpy(), mode="lines",
+                                         name=f"{label} mean", line={"width": 2}))
+            fig.update_layout(title=f"{col} over time", xaxis_title=time_col, yaxis_title=col)
+            charts.append({
+                "type": "timeseries",
+                "column": col,
+                "data": fig.to_json()
+            })
+        return charts
+    
+    @staticmethod
+    def _resample_rule(start: pd.Timestamp, end: pd.Timestamp) -> tuple[Optional[str], Optional[str]]:
+        # Finest calendar bucket that still fits within the point budget
+        span_days = (end - start).total_seconds() / 86400
+        for rule, label, days in RESAMPLE_RULES:
+            if 2 <= span_days / days <= TIMESERIES_POINTS:
+                return rule, label
+        return None, None
+    
     def _create_bar_charts(self, columns: List[str]) -> List[Dict[str, Any]]:
         charts = []
         for col in columns:
@@ -73,3 +150,60 @@ class VisualizationAgent:
                 "data": fig.to_json()
             })
         return charts
+
+class StateVisualizationAgent:
+    def render(self, chart: Dict[str, Any]) -> Dict[str, Any]:
+        renderers = {
+            "histogram": self._render_histogram,
+            "boxplot": self._render_boxplot,
+            "heatmap": self._render_heatmap,
+            "bar": self._render_bar,
+            "timeseries": self._render_timeseries,
+        }
+        fig = renderers[chart["type"]](chart["column"], chart["inputs"])
+        return {
+            "type": chart["type"],
+            "column": chart["column"],
+            "data": fig.to_json()
+        }
+    
+    def _render_histogram(self, col: str, inputs: Dict[str, Any]) -> go.Figure:
+        edges = inputs["edges"]
+        centers = [(a + b) / 2 for a, b in zip(edges[:-1], edges[1:])] or edges
+        widths = [b - a for a, b in zip(edges[:-1], edges[1:])] or None
+        fig = go.Figure(go.Bar(x=centers, y=inputs["counts"], width=widths))
+        fig.update_layout(title=f"Distribution of {col}", xaxis_title=col, yaxis_title="count", bargap=0)
+        return fig
+    
+    def _render_boxplot(self, col: str, inputs: Dict[str, Any]) -> go.Figure:
+        fig = go.Figure(go.Box(
+            name=col,
+            q1=[inputs["q1"]], median=[inputs["median"]], q3=[inputs["q3"]],
+            lowerfence=[inputs["lowerfence"]], upperfence=[inputs["upperfence"]]
+        ))
+        fig.update_layout(title=f"Boxplot of {col}", yaxis_title=col)
+        return fig
+    
+    def _render_heatmap(self, col: str, inputs: Dict[str, Any]) -> go.Figure:
+        fig = px.imshow(inputs["values"],
+                       x=inputs["columns"],
+                       y=inputs["columns"],
+                       text_auto=True,
+                       title="Correlation Heatmap",
+                       color_continuous_scale="RdBu_r")
+        return fig
+    
+    def _render_bar(self, col: str, inputs: Dict[str, Any]) -> go.Figure:
+        return px.bar(x=inputs["labels"], y=inputs["counts"],
+                     title=f"Top 10 Values in {col}",
+                     labels={'x': col, 'y': 'Count'})
+    
+    def _render_timeseries(self, col: str, inputs: Dict[str, Any]) -> go.Figure:
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=inputs["x"], y=inputs["y"], mode="lines",
+                                 name=col, line={"width": 1}, opacity=0.6))
+        if inputs.get("label"):
+            fig.add_trace(go.Scatter(x=inputs["bucket_x"], y=inputs["bucket_y"], mode="lines",
+                                     name=f"{inputs['label']} mean", line={"width": 2}))
+        fig.update_layout(title=f"{col} over time", xaxis_title=inputs["time_column"], yaxis_title=col)
+        return fig
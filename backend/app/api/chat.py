@@ -2,13 +2,29 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from typing import List
 from bson import ObjectId
-from openai import OpenAI
 from app.api.dependencies import get_current_user
 from app.core.database import get_database
 from app.core.config import settings
+from app.services.query_service import QueryService
+from app.agents.context_agent import ContextAgent
 
 router = APIRouter(prefix="/chat", tags=["Chatbot"])
 
+_llm_client = None
+
+def get_llm_client():
+    # Reused across requests so the HTTP connection pool stays warm; the SDK
+    # is imported on first use to keep it out of the API start-up path
+    global _llm_client
+    if _llm_client is None:
+        from openai import OpenAI
+        
+        _llm_client = OpenAI(
+            base_url="https://router.huggingface.co/v1",
+            api_key=settings.HUGGINGFACE_API_KEY,
+        )
+    return _llm_client
+
 class ChatMessage(BaseModel):
     message: str
 
@@ -30,6 +46,11 @@ async def chat_with_dataset(
     if dataset.get("status") != "completed":
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Dataset analysis not completed")
     
+    # Numeric questions are answered exactly from the stored data
+    local_answer = await QueryService.answer_question(dataset, chat_message.message)
+    if local_answer:
+        return ChatResponse(response=local_answer)
+    
     # Get analysis context
     analysis = dataset.get("analysis_result", {})
     eda = analysis.get("eda_results", {})
@@ -38,37 +59,16 @@ async def chat_with_dataset(
     quality = eda.get("data_quality", {})
     column_analysis = eda.get("column_analysis", {})
     
-    # Build detailed context
-    columns_info = "\n".join([f"- {col}: {info.get('dtype', 'unknown')} ({info.get('unique_values', 0)} unique values)" 
-                              for col, info in list(column_analysis.items())[:10]])
+    # Column summaries are indexed once per dataset and ranked per question
+    context_index = dataset.get("context_index")
+    if not context_index:
+        context_index = ContextAgent.build_index(dataset["filename"], analysis)
+        await db.datasets.update_one({"_id": dataset["_id"]}, {"$set": {"context_index": context_index}})
     
-    context = f"""You are analyzing the dataset '{dataset['filename']}'.
-
-Dataset Overview:
-- Total Rows: {overview.get('rows', 'N/A'):,}
-- Total Columns: {overview.get('columns', 'N/A')}
-- Data Completeness: {quality.get('completeness', 0):.1f}%
-- Memory Usage: {overview.get('memory_usage', 'N/A')}
-
-Data Quality:
-- Missing Values: {len(cleaning.get('missing_values', {}))} columns affected
-- Duplicates Removed: {cleaning.get('duplicates_removed', 0)}
-- Outliers Detected: {len(cleaning.get('outliers_detected', {}))} columns
-- Numeric Columns: {quality.get('numeric_columns', 0)}
-- Categorical Columns: {quality.get('categorical_columns', 0)}
-
-Column Details:
-{columns_info}
-
-User Question: {chat_message.message}
-
-Provide a clear, concise answer based on the data above. If asked about specific columns, trends, or recommendations, use the context provided."""
+    context = ContextAgent.build_prompt(context_index, chat_message.message, settings.CHAT_CONTEXT_TOKEN_BUDGET)
     
     try:
-        client = OpenAI(
-            base_url="https://router.huggingface.co/v1",
-            api_key=settings.HUGGINGFACE_API_KEY,
-        )
+        client = get_llm_client()
         
         completion = client.chat.completions.create(
             model="Qwen/Qwen3-Coder-Next:novita",
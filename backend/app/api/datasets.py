@@ -1,17 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks, Query, Request, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 import os
 import shutil
+import asyncio
 from bson import ObjectId
 from app.api.dependencies import get_current_user
+from app.core.config import settings
 from app.services.dataset_service import DatasetService
-from app.models.schemas import DatasetUploadResponse, AnalysisResponse
+from app.services.query_service import QueryService, QueryBudgetExceeded
+from app.services.scheduler_service import scheduler
+from app.services.export_service import ExportService, MEDIA_TYPES
+from app.models.schemas import DatasetUploadResponse, AnalysisResponse, QueryRequest, QueryResponse
 
 router = APIRouter(prefix="/datasets", tags=["Datasets"])
 
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+async def schedule_job(background_tasks: BackgroundTasks, dataset_id: str, user_id: str, job: dict):
+    # API-only processes leave the job on the dataset for a worker to claim
+    if settings.API_ONLY:
+        await DatasetService.defer_job(dataset_id, job)
+    else:
+        background_tasks.add_task(scheduler.submit_job, dataset_id, user_id, job)
+
 @router.post("/upload", response_model=DatasetUploadResponse)
 async def upload_csv(
     background_tasks: BackgroundTasks,
@@ -35,15 +48,188 @@ async def upload_csv(
         file_path=file_path
     )
     
-    background_tasks.add_task(DatasetService.process_dataset, str(dataset["_id"]))
+    dataset_id = str(dataset["_id"])
+    await schedule_job(background_tasks, dataset_id, dataset["user_id"], {"kind": "analyze", "file_path": file_path})
     
     return DatasetUploadResponse(
-        dataset_id=str(dataset["_id"]),
+        dataset_id=dataset_id,
         filename=dataset["filename"],
         status=dataset["status"],
         message="File uploaded successfully. Analysis in progress."
     )
 
+@router.post("/{dataset_id}/append", response_model=DatasetUploadResponse)
+async def append_csv(
+    dataset_id: str,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    current_user: dict = Depends(get_current_user)
+):
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only CSV files are allowed"
+        )
+    
+    dataset = await DatasetService.get_dataset(dataset_id, str(current_user["_id"]))
+    
+    if not dataset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dataset not found"
+        )
+    
+    if dataset.get("status") != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Dataset analysis not completed"
+        )
+    
+    if not dataset.get("analysis_state_path"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Dataset does not support appending. Please upload it again."
+        )
+    
+    if not await DatasetService.mark_processing(dataset_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Dataset is already being processed"
+        )
+    
+    batch_path = os.path.join(UPLOAD_DIR, f"{ObjectId()}_{file.filename}")
+    
+    with open(batch_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+    
+    await schedule_job(background_tasks, dataset_id, dataset["user_id"], {"kind": "append", "file_path": batch_path})
+    
+    return DatasetUploadResponse(
+        dataset_id=dataset_id,
+        filename=dataset["filename"],
+        status="processing",
+        message="Rows uploaded successfully. Incremental analysis in progress."
+    )
+
+@router.post("/{dataset_id}/query", response_model=QueryResponse)
+async def query_dataset(
+    dataset_id: str,
+    query: QueryRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    dataset = await DatasetService.get_dataset(dataset_id, str(current_user["_id"]))
+    
+    if not dataset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dataset not found"
+        )
+    
+    try:
+        result = await QueryService.run_query(dataset, query.model_dump())
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except QueryBudgetExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    
+    return QueryResponse(**result)
+
+@router.get("/{dataset_id}/cleaned")
+async def download_cleaned(
+    dataset_id: str,
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    columns: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    dataset = await DatasetService.get_dataset(dataset_id, str(current_user["_id"]))
+    
+    if not dataset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dataset not found"
+        )
+    
+    if not dataset.get("cleaned_path"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cleaned data not available for this dataset"
+        )
+    
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    if selected:
+        known = (((dataset.get("analysis_result") or {}).get("eda_results") or {})
+                 .get("overview", {}).get("column_names", []))
+        unknown = [c for c in selected if c not in known]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown columns: {', '.join(unknown)}"
+            )
+    
+    # Only range requests wait for the export file; a full download that
+    # is not cached yet streams the conversion as it is written
+    wants_range = bool(request.headers.get("range"))
+    try:
+        path, etag = await asyncio.to_thread(
+            ExportService.prepare if wants_range else ExportService.cached, dataset, format, selected
+        )
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cleaned data not available for this dataset"
+        )
+    
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{etag}"',
+        "Content-Disposition": f'attachment; filename="{os.path.splitext(dataset["filename"])[0]}_cleaned.{format}"'
+    }
+    
+    if path is None:
+        return StreamingResponse(
+            ExportService.stream(dataset, format, selected),
+            media_type=MEDIA_TYPES[format],
+            headers=headers
+        )
+    
+    size = os.path.getsize(path)
+    # A resumed download only gets a partial response if it still matches this export
+    if_range = request.headers.get("if-range")
+    byte_range = None
+    if not if_range or if_range.strip('"') == etag:
+        try:
+            byte_range = ExportService.parse_range(request.headers.get("range"), size)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{size}"}
+            )
+    
+    start, end = byte_range or (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    
+    return StreamingResponse(
+        ExportService.iter_file(path, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+        media_type=MEDIA_TYPES[format],
+        headers=headers
+    )
+
 @router.get("/analysis/{dataset_id}", response_model=AnalysisResponse)
 async def get_analysis(
     dataset_id: str,
@@ -67,6 +253,8 @@ async def get_analysis(
         eda_results=analysis_result.get("eda_results"),
         visualizations=analysis_result.get("visualizations"),
         ai_insights=analysis_result.get("ai_insights"),
+        queue_position=dataset.get("queue_position"),
+        estimated_start=dataset.get("estimated_start"),
         created_at=dataset["upload_date"]
     )
 
@@ -79,6 +267,8 @@ async def list_datasets(current_user: dict = Depends(get_current_user)):
             "dataset_id": str(ds["_id"]),
             "filename": ds["filename"],
             "status": ds["status"],
+            "queue_position": ds.get("queue_position"),
+            "estimated_start": ds.get("estimated_start"),
             "upload_date": ds["upload_date"]
         }
         for ds in datasets
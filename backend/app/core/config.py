@@ -7,6 +7,24 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
     HUGGINGFACE_API_KEY: str = ""
+    API_ONLY: bool = False
+    WORKER_POLL_SECONDS: float = 2.0
+    ANALYSIS_MEMORY_BUDGET_MB: int = 2048
+    ANALYSIS_MEMORY_FACTOR: float = 3.0
+    ANALYSIS_MAX_JOBS_PER_USER: int = 2
+    ANALYSIS_THROUGHPUT_MB_S: float = 20.0
+    ANALYSIS_AGING_SECONDS: float = 60.0
+    FINGERPRINT_MEMORY_LIMIT_MB: int = 512
+    CLEANED_ROW_GROUP_ROWS: int = 100_000
+    EXPORT_BATCH_ROWS: int = 65_536
+    EXPORT_CHUNK_BYTES: int = 1024 * 1024
+    EXPORT_CACHE_MAX_MB: int = 2048
+    CHAT_CONTEXT_TOKEN_BUDGET: int = 1500
+    QUERY_MAX_ROWS: int = 10_000_000
+    QUERY_MAX_RESULT_ROWS: int = 1000
+    QUERY_TIMEOUT_SECONDS: float = 5.0
+    QUERY_FRAME_CACHE_SIZE: int = 4
+    QUERY_RESULT_CACHE_SIZE: int = 256
     
     class Config:
         env_file = ".env"
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, field_validator
-from typing import Optional, Dict, Any, List
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
 
 class UserSignUp(BaseModel):
@@ -54,4 +54,37 @@ class AnalysisResponse(BaseModel):
     eda_results: Optional[Dict[str, Any]] = None
     visualizations: Optional[List[Dict[str, Any]]] = None
     ai_insights: Optional[str] = None
+    queue_position: Optional[int] = None
+    estimated_start: Optional[datetime] = None
     created_at: datetime
+
+class QueryFilter(BaseModel):
+    column: str
+    op: Literal["eq", "ne", "gt", "gte", "lt", "lte", "in", "contains"]
+    value: Any = None
+
+class QueryAggregation(BaseModel):
+    func: Literal["count", "sum", "mean", "median", "min", "max", "nunique", "std"]
+    column: Optional[str] = None
+    alias: Optional[str] = None
+
+class QueryOrder(BaseModel):
+    column: str
+    descending: bool = True
+
+class QueryRequest(BaseModel):
+    filters: List[QueryFilter] = []
+    group_by: List[str] = []
+    aggregations: List[QueryAggregation] = []
+    columns: List[str] = []
+    order_by: Optional[QueryOrder] = None
+    limit: Optional[int] = Field(None, ge=1)
+
+class QueryResponse(BaseModel):
+    columns: List[str]
+    rows: List[List[Any]]
+    row_count: int
+    rows_scanned: int
+    truncated: bool
+    cached: bool
+    elapsed_ms: float
@@ -1,8 +1,10 @@
+import os
+import asyncio
 from datetime import datetime
 from bson import ObjectId
 from typing import Optional, Dict, Any
 from app.core.database import get_database
-from app.agents.orchestrator import OrchestratorAgent
+from app.agents.context_agent import ContextAgent
 
 class DatasetService:
     @staticmethod
@@ -31,8 +33,11 @@ class DatasetService:
             return
         
         try:
+            from app.agents.orchestrator import OrchestratorAgent
+            
             orchestrator = OrchestratorAgent(dataset["file_path"])
-            analysis_result = await orchestrator.run_analysis()
+            # CPU-bound work runs off the event loop so admitted jobs run side by side
+            analysis_result = await asyncio.to_thread(asyncio.run, orchestrator.run_analysis())
             
             await db.datasets.update_one(
                 {"_id": ObjectId(dataset_id)},
@@ -40,6 +45,10 @@ class DatasetService:
                     "$set": {
                         "status": "completed",
                         "analysis_result": analysis_result,
+                        "analysis_state_path": orchestrator.state_path,
+                        "context_index": ContextAgent.build_index(dataset["filename"], analysis_result),
+                        "cleaned_path": orchestrator.cleaned_path if orchestrator.cleaned_parts else None,
+                        "cleaned_parts": orchestrator.cleaned_parts,
                         "completed_at": datetime.utcnow()
                     }
                 }
@@ -55,6 +64,89 @@ class DatasetService:
                 }
             )
     
+    @staticmethod
+    async def append_dataset(dataset_id: str, batch_path: str):
+        db = await get_database()
+        
+        dataset = await db.datasets.find_one({"_id": ObjectId(dataset_id)})
+        if not dataset:
+            return
+        
+        try:
+            from app.agents.orchestrator import OrchestratorAgent
+            
+            orchestrator = OrchestratorAgent(dataset["file_path"])
+            analysis_result = await asyncio.to_thread(asyncio.run, orchestrator.run_append(
+                batch_path, dataset["analysis_state_path"], dataset.get("analysis_result") or {}
+            ))
+            
+            await db.datasets.update_one(
+                {"_id": ObjectId(dataset_id)},
+                {
+                    "$set": {
+                        "status": "completed",
+                        "analysis_result": analysis_result,
+                        "analysis_state_path": orchestrator.state_path,
+                        "context_index": ContextAgent.build_index(dataset["filename"], analysis_result),
+                        "cleaned_path": orchestrator.cleaned_path if orchestrator.cleaned_parts else None,
+                        "cleaned_parts": orchestrator.cleaned_parts,
+                        "completed_at": datetime.utcnow(),
+                        "error": None
+                    },
+                    "$inc": {"appended_batches": 1}
+                }
+            )
+            # The new state is committed, so the files only the old one used can go
+            orchestrator.discard_superseded()
+        except Exception as e:
+            # The previous analysis is still valid, so keep it available
+            await db.datasets.update_one(
+                {"_id": ObjectId(dataset_id)},
+                {
+                    "$set": {
+                        "status": "completed",
+                        "error": f"Append failed: {str(e)}"
+                    }
+                }
+            )
+        finally:
+            if os.path.exists(batch_path):
+                os.remove(batch_path)
+    
+    @staticmethod
+    async def mark_processing(dataset_id: str) -> bool:
+        db = await get_database()
+        result = await db.datasets.update_one(
+            {"_id": ObjectId(dataset_id), "status": "completed"},
+            {"$set": {"status": "processing"}}
+        )
+        return result.modified_count == 1
+    
+    @staticmethod
+    async def defer_job(dataset_id: str, job: Dict[str, Any]):
+        db = await get_database()
+        await db.datasets.update_one(
+            {"_id": ObjectId(dataset_id)},
+            {"$set": {"pending_job": job}}
+        )
+    
+    @staticmethod
+    async def claim_pending_job() -> Optional[Dict[str, Any]]:
+        db = await get_database()
+        return await db.datasets.find_one_and_update(
+            {"pending_job": {"$type": "object"}},
+            {"$set": {"pending_job": None}},
+            sort=[("upload_date", 1)]
+        )
+    
+    @staticmethod
+    async def update_queue_status(dataset_id: str, position: Optional[int], estimated_start: Optional[datetime]):
+        db = await get_database()
+        await db.datasets.update_one(
+            {"_id": ObjectId(dataset_id)},
+            {"$set": {"queue_position": position, "estimated_start": estimated_start}}
+        )
+    
     @staticmethod
     async def get_dataset(dataset_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         db = await get_database()
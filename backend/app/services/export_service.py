@@ -0,0 +1,219 @@
+import os
+import glob
+import hashlib
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+from app.core.config import settings
+
+MEDIA_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+class ExportService:
+    # Cleaned data is stored as Parquet parts (one per analysis or append).
+    # Downloads are materialised once per (format, columns, parts) into an
+    # export file, converted batch by batch, then served from disk in chunks
+    # so byte ranges are stable for resumed downloads. Export files are kept
+    # within EXPORT_CACHE_MAX_MB, evicting the least recently served.
+
+    @staticmethod
+    def parts(dataset: Dict[str, Any]) -> List[str]:
+        # Parts past the committed count belong to an append that never completed
+        parts = sorted(glob.glob(os.path.join(dataset["cleaned_path"], "part-*.parquet")))
+        return parts[:dataset.get("cleaned_parts") or len(parts)]
+
+    @staticmethod
+    def version(parts: List[str]) -> str:
+        stamp = "|".join(f"{p}:{os.path.getsize(p)}:{os.path.getmtime(p)}" for p in parts)
+        return hashlib.sha1(stamp.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def schema(parts: List[str], columns: Optional[List[str]]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Parts written by different appends may disagree on a column's type
+        # (e.g. int64 vs double); numeric conflicts widen to double and any
+        # other conflict falls back to string.
+        fields: Dict[str, Any] = {}
+        for part in parts:
+            for field in pq.read_schema(part):
+                if columns and field.name not in columns:
+                    continue
+                current = fields.get(field.name)
+                if current is None or current == field.type or pa.types.is_null(field.type):
+                    fields.setdefault(field.name, field.type)
+                elif pa.types.is_null(current):
+                    fields[field.name] = field.type
+                elif pa.types.is_integer(current) or pa.types.is_floating(current):
+                    numeric = pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+                    fields[field.name] = pa.float64() if numeric else pa.string()
+                else:
+                    fields[field.name] = pa.string()
+        order = columns or list(fields)
+        return pa.schema([(name, fields[name]) for name in order])
+
+    @staticmethod
+    def read_tables(parts: List[str], schema) -> Iterator[Any]:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        for part in parts:
+            for batch in pq.ParquetFile(part).iter_batches(batch_size=settings.EXPORT_BATCH_ROWS,
+                                                           columns=schema.names):
+                yield pa.Table.from_batches([batch]).select(schema.names).cast(schema)
+
+    @classmethod
+    def _write_export(cls, parts: List[str], fmt: str, columns: Optional[List[str]], path: str, tmp_path: str):
+        import pyarrow.csv as pacsv
+        import pyarrow.parquet as pq
+
+        # Concurrent requests for the same export each write their own temp
+        # file; the rename makes each complete file visible atomically.
+        try:
+            schema = cls.schema(parts, columns)
+            writer = pq.ParquetWriter(tmp_path, schema) if fmt == "parquet" else pacsv.CSVWriter(tmp_path, schema)
+            try:
+                for table in cls.read_tables(parts, schema):
+                    writer.write_table(table)
+            finally:
+                writer.close()
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        cls._evict(path)
+
+    @classmethod
+    def _locate(cls, dataset: Dict[str, Any], fmt: str, columns: Optional[List[str]]) -> Tuple[List[str], str, str]:
+        parts = cls.parts(dataset)
+        if not parts:
+            raise FileNotFoundError("Cleaned data not found")
+
+        # The stored file already is the requested export
+        if fmt == "parquet" and not columns and len(parts) == 1:
+            return parts, parts[0], cls.version(parts)
+
+        selection = hashlib.sha1(f"{fmt}:{','.join(columns or [])}".encode("utf-8")).hexdigest()[:12]
+        version = cls.version(parts)
+        export_dir = f"{dataset['cleaned_path']}.exports"
+        os.makedirs(export_dir, exist_ok=True)
+        return parts, os.path.join(export_dir, f"{selection}-{version}.{fmt}"), f"{selection}-{version}"
+
+    @staticmethod
+    def _start_export(path: str) -> str:
+        directory, name = os.path.split(path)
+        selection, fmt = name.split("-")[0], name.rsplit(".", 1)[1]
+        for stale in glob.glob(os.path.join(directory, f"{selection}-*.{fmt}")):
+            if stale != path:
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        os.close(fd)
+        return tmp_path
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        # Serving an export marks it as recently used for eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    @classmethod
+    def cached(cls, dataset: Dict[str, Any], fmt: str, columns: Optional[List[str]]) -> Tuple[Optional[str], str]:
+        parts, path, etag = cls._locate(dataset, fmt, columns)
+        return (path if path in parts or cls._touch(path) else None), etag
+
+    @classmethod
+    def prepare(cls, dataset: Dict[str, Any], fmt: str, columns: Optional[List[str]]) -> Tuple[str, str]:
+        parts, path, etag = cls._locate(dataset, fmt, columns)
+        if path not in parts and not cls._touch(path):
+            cls._write_export(parts, fmt, columns, path, cls._start_export(path))
+        return path, etag
+
+    @classmethod
+    def stream(cls, dataset: Dict[str, Any], fmt: str, columns: Optional[List[str]]) -> Iterator[bytes]:
+        # The conversion runs in its own thread and the response follows the
+        # temp file as it grows, so the first bytes go out straight away and
+        # the export is still cached if the client disconnects.
+        parts, path, _ = cls._locate(dataset, fmt, columns)
+        tmp_path = cls._start_export(path)
+        errors: List[BaseException] = []
+
+        def convert():
+            try:
+                cls._write_export(parts, fmt, columns, path, tmp_path)
+            except Exception as e:
+                errors.append(e)
+
+        with open(tmp_path, "rb") as f:
+            worker = threading.Thread(target=convert, daemon=True)
+            worker.start()
+            while True:
+                finished = not worker.is_alive()
+                chunk = f.read(settings.EXPORT_CHUNK_BYTES)
+                if chunk:
+                    yield chunk
+                elif finished:
+                    break
+                else:
+                    worker.join(0.05)
+        if errors:
+            raise errors[0]
+
+    @staticmethod
+    def _evict(keep: str):
+        # Exports of all datasets share one byte budget; the least recently
+        # served files are removed first
+        uploads = os.path.dirname(os.path.dirname(keep))
+        files = []
+        for path in glob.glob(os.path.join(uploads, "*.exports", "*")):
+            if path.endswith(".tmp") or path == keep:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = os.path.getsize(keep) + sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= settings.EXPORT_CACHE_MAX_MB * 1024**2:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    @staticmethod
+    def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+        # Single byte range only ("bytes=start-end", "bytes=start-" or
+        # "bytes=-suffix"); returns an inclusive (start, end) pair.
+        if not header or not header.startswith("bytes=") or "," in header:
+            return None
+        start, _, end = header[len("bytes="):].strip().partition("-")
+        if not start:
+            if not end.isdigit() or int(end) == 0:
+                raise ValueError("Unsatisfiable range")
+            return max(size - int(end), 0), size - 1
+        if not start.isdigit() or (end and not end.isdigit()):
+            return None
+        first, last = int(start), int(end) if end else size - 1
+        if first >= size or first > last:
+            raise ValueError("Unsatisfiable range")
+        return first, min(last, size - 1)
+
+    @staticmethod
+    def iter_file(path: str, start: int, end: int) -> Iterator[bytes]:
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(settings.EXPORT_CHUNK_BYTES, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
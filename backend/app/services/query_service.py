@@ -0,0 +1,126 @@
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+from app.core.config import settings
+from app.services.export_service import ExportService
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+class QueryService:
+    # Queries run on the cleaned Parquet parts, so answers agree with the EDA
+    # figures. Loaded columns and query results are cached per dataset
+    # version (the committed parts), so an append invalidates both.
+    _frames: "OrderedDict[str, Tuple[str, pd.DataFrame]]" = OrderedDict()
+    _results: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+    _loading: Dict[str, threading.Lock] = {}
+
+    @staticmethod
+    def _parts(dataset: Dict[str, Any]) -> List[str]:
+        parts = ExportService.parts(dataset) if dataset.get("cleaned_path") else []
+        if not parts:
+            raise FileNotFoundError("Cleaned data not available for this dataset")
+        return parts
+
+    @staticmethod
+    def _overview(dataset: Dict[str, Any]) -> Dict[str, Any]:
+        return ((dataset.get("analysis_result") or {}).get("eda_results") or {}).get("overview") or {}
+
+    @staticmethod
+    def _timed_out() -> QueryBudgetExceeded:
+        return QueryBudgetExceeded(f"Query exceeded the {settings.QUERY_TIMEOUT_SECONDS:g}s time budget")
+
+    @classmethod
+    def _load_columns(cls, dataset: Dict[str, Any], parts: List[str], version: str,
+                      columns: List[str], deadline: float) -> "pd.DataFrame":
+        import pandas as pd
+        import pyarrow as pa
+        
+        key = str(dataset["_id"])
+        # Concurrent queries on one dataset wait for a single load instead of
+        # each reading the same columns
+        lock = cls._loading.setdefault(key, threading.Lock())
+        if not lock.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            raise cls._timed_out()
+        try:
+            cached = cls._frames.get(key)
+            df = cached[1] if cached and cached[0] == version else pd.DataFrame()
+            missing = [c for c in columns if c not in df.columns]
+            if missing:
+                schema = ExportService.schema(parts, missing)
+                tables = []
+                for table in ExportService.read_tables(parts, schema):
+                    if time.monotonic() > deadline:
+                        raise cls._timed_out()
+                    tables.append(table)
+                loaded = (pa.concat_tables(tables) if tables else schema.empty_table()).to_pandas()
+                df = pd.concat([df, loaded], axis=1) if len(df.columns) else loaded
+            cls._frames[key] = (version, df)
+            cls._frames.move_to_end(key)
+            while len(cls._frames) > settings.QUERY_FRAME_CACHE_SIZE:
+                cls._frames.popitem(last=False)
+            return df[columns]
+        finally:
+            lock.release()
+
+    @classmethod
+    def _execute(cls, dataset: Dict[str, Any], spec: Dict[str, Any], parts: List[str],
+                 version: str, deadline: float) -> Dict[str, Any]:
+        from app.agents.query_agent import QueryAgent
+        
+        columns = QueryAgent.required_columns(spec, cls._overview(dataset).get("column_names", []))
+        df = cls._load_columns(dataset, parts, version, columns, deadline)
+        try:
+            return QueryAgent(df).run(spec, settings.QUERY_MAX_RESULT_ROWS, deadline)
+        except TimeoutError:
+            raise cls._timed_out()
+
+    @classmethod
+    async def run_query(cls, dataset: Dict[str, Any], spec: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        parts = cls._parts(dataset)
+        version = ExportService.version(parts)
+        cache_key = (str(dataset["_id"]), version, json.dumps(spec, sort_keys=True, default=str))
+
+        result = cls._results.get(cache_key)
+        cached = result is not None
+        if cached:
+            cls._results.move_to_end(cache_key)
+        else:
+            rows = cls._overview(dataset).get("rows", 0)
+            if rows > settings.QUERY_MAX_ROWS:
+                raise QueryBudgetExceeded(
+                    f"Dataset has {rows:,} rows, above the query limit of {settings.QUERY_MAX_ROWS:,}"
+                )
+            # The worker thread checks the deadline between batches and query
+            # stages and stops there, rather than running on after a timeout
+            deadline = time.monotonic() + settings.QUERY_TIMEOUT_SECONDS
+            result = await asyncio.to_thread(cls._execute, dataset, spec, parts, version, deadline)
+            cls._results[cache_key] = result
+            while len(cls._results) > settings.QUERY_RESULT_CACHE_SIZE:
+                cls._results.popitem(last=False)
+
+        return {**result, "cached": cached, "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    @classmethod
+    async def answer_question(cls, dataset: Dict[str, Any], question: str) -> Optional[str]:
+        from app.agents.query_agent import QueryAgent
+        
+        # The question is matched against the stored column types, so data is
+        # only loaded once it is known the question can be answered locally
+        eda = (dataset.get("analysis_result") or {}).get("eda_results") or {}
+        dtypes = {col: info.get("dtype", "") for col, info in (eda.get("column_analysis") or {}).items()}
+        spec = QueryAgent.parse_question(question, dtypes)
+        if spec is None:
+            return None
+        try:
+            result = await cls.run_query(dataset, spec)
+        except (QueryBudgetExceeded, ValueError, OSError):
+            return None
+        return QueryAgent.describe_result(spec, result)
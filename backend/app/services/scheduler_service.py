@@ -0,0 +1,146 @@
+import io
+import os
+import time
+import asyncio
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Dict, Any, List, Callable, Awaitable, Optional
+from app.core.config import settings
+from app.services.dataset_service import DatasetService
+
+SNIFF_BYTES = 1024 * 1024
+
+def estimate_peak_memory(file_path: str) -> int:
+    import pandas as pd
+    
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+    # Only parse whole lines so the last sampled row is not truncated
+    if len(head) == SNIFF_BYTES and b"\n" in head:
+        head = head[:head.rfind(b"\n") + 1]
+
+    try:
+        sample = pd.read_csv(io.BytesIO(head), encoding_errors="replace")
+    except Exception:
+        sample = None
+
+    if sample is None or sample.empty:
+        return int(size * settings.ANALYSIS_MEMORY_FACTOR)
+
+    # Deep memory usage accounts for the per-value overhead of object columns,
+    # which is what makes text-heavy CSVs so much larger in pandas than on disk.
+    bytes_per_row = sample.memory_usage(deep=True).sum() / len(sample)
+    estimated_rows = size * (len(sample) + 1) / len(head)
+    return int(estimated_rows * bytes_per_row * settings.ANALYSIS_MEMORY_FACTOR)
+
+class AnalysisJob:
+    def __init__(self, dataset_id: str, user_id: str, file_path: str, memory: int,
+                 run: Callable[[], Awaitable[None]]):
+        self.dataset_id = dataset_id
+        self.user_id = user_id
+        self.memory = memory
+        self.run = run
+        self.duration = os.path.getsize(file_path) / (settings.ANALYSIS_THROUGHPUT_MB_S * 1024**2) + 1
+        self.submitted = time.monotonic()
+        self.started: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+class AnalysisScheduler:
+    def __init__(self):
+        self.queue: List[AnalysisJob] = []
+        self.running: List[AnalysisJob] = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def budget(self) -> int:
+        return settings.ANALYSIS_MEMORY_BUDGET_MB * 1024**2
+
+    async def submit(self, dataset_id: str, user_id: str, file_path: str,
+                     run: Callable[[], Awaitable[None]]):
+        memory = await asyncio.to_thread(estimate_peak_memory, file_path)
+        async with self._lock:
+            self.queue.append(AnalysisJob(dataset_id, user_id, file_path, memory, run))
+        await self._dispatch()
+
+    async def submit_job(self, dataset_id: str, user_id: str, job: Dict[str, Any]):
+        if job["kind"] == "append":
+            run = partial(DatasetService.append_dataset, dataset_id, job["file_path"])
+        else:
+            run = partial(DatasetService.process_dataset, dataset_id)
+        await self.submit(dataset_id, user_id, job["file_path"], run)
+
+    def _ordered_queue(self) -> List[AnalysisJob]:
+        now = time.monotonic()
+        user_memory: Dict[str, int] = {}
+        for job in self.running:
+            user_memory[job.user_id] = user_memory.get(job.user_id, 0) + job.memory
+
+        # Users with the least memory in use go first; within that, smaller
+        # jobs go first, with waiting time slowly promoting large ones.
+        def priority(job: AnalysisJob):
+            waited = now - job.submitted
+            return (user_memory.get(job.user_id, 0),
+                    job.memory / (1 + waited / settings.ANALYSIS_AGING_SECONDS))
+
+        return sorted(self.queue, key=priority)
+
+    def _user_running(self, user_id: str) -> int:
+        return sum(1 for job in self.running if job.user_id == user_id)
+
+    async def _dispatch(self):
+        async with self._lock:
+            started = []
+            while True:
+                used = sum(job.memory for job in self.running)
+                candidates = [job for job in self._ordered_queue()
+                              if self._user_running(job.user_id) < settings.ANALYSIS_MAX_JOBS_PER_USER]
+                if not candidates:
+                    break
+                job = candidates[0]
+                # A job larger than the whole budget may still run on its own.
+                # Otherwise the head job keeps its place until memory frees up.
+                if self.running and used + job.memory > self.budget:
+                    break
+                self.queue.remove(job)
+                job.started = time.monotonic()
+                self.running.append(job)
+                started.append(job)
+
+            queued = self._estimate_starts()
+
+        for job in started:
+            await DatasetService.update_queue_status(job.dataset_id, None, None)
+            job.task = asyncio.create_task(self._run(job))
+        for position, (job, start) in enumerate(queued, start=1):
+            await DatasetService.update_queue_status(job.dataset_id, position, start)
+
+    def _estimate_starts(self) -> List[tuple]:
+        # Replay the admission policy against the expected finish times of the
+        # running jobs to give each queued job an estimated start time.
+        now = time.monotonic()
+        wall = datetime.utcnow()
+        slots = [(job.started + job.duration, job.memory, job.user_id) for job in self.running]
+        estimates = []
+        for job in self._ordered_queue():
+            slots.sort()
+            clock = now
+            while slots and (
+                sum(m for _, m, _ in slots) + job.memory > self.budget
+                or sum(1 for _, _, u in slots if u == job.user_id) >= settings.ANALYSIS_MAX_JOBS_PER_USER
+            ):
+                end, _, _ = slots.pop(0)
+                clock = max(clock, end)
+            slots.append((clock + job.duration, job.memory, job.user_id))
+            estimates.append((job, wall + timedelta(seconds=max(clock - now, 0))))
+        return estimates
+
+    async def _run(self, job: AnalysisJob):
+        try:
+            await job.run()
+        finally:
+            async with self._lock:
+                self.running.remove(job)
+            await self._dispatch()
+
+scheduler = AnalysisScheduler()
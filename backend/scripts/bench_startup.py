@@ -0,0 +1,63 @@
+"""Measure API start-up cost: import time, peak RSS and heavy modules loaded.
+
+Run from the backend directory:
+
+    python scripts/bench_startup.py [--runs 5]
+
+Each scenario is imported in a fresh interpreter so results are not skewed
+by modules cached from a previous run.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "plotly", "openai", "requests"]
+
+# What each process has imported once it is serving: the API at start-up, the
+# API after its first local query or chat shortcut, a worker at start-up, and
+# a process that has run an analysis.
+SCENARIOS = {
+    "api": "import main",
+    "api after first query": "import main; import app.agents.query_agent; import pyarrow.parquet",
+    "worker": "import worker",
+    "analysis stack": "import main; import app.agents.orchestrator",
+}
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+exec({code!r})
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss //= 1024
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": rss / 1024,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+def measure(code: str) -> dict:
+    probe = PROBE.format(code=code, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", probe], check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<22} {'import s (median)':>18} {'peak RSS MB':>12}  heavy modules loaded")
+    for name, code in SCENARIOS.items():
+        results = [measure(code) for _ in range(args.runs)]
+        seconds = statistics.median(r["seconds"] for r in results)
+        rss = statistics.median(r["rss_mb"] for r in results)
+        heavy = ", ".join(results[-1]["heavy"]) or "-"
+        print(f"{name:<22} {seconds:>18.3f} {rss:>12.1f}  {heavy}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import asyncio
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection
+from app.services.dataset_service import DatasetService
+from app.services.scheduler_service import scheduler
+
+async def run_worker():
+    await connect_to_mongo()
+    try:
+        while True:
+            # Only claim more work once the local queue has drained, so other
+            # workers get a share of the pending jobs
+            dataset = await DatasetService.claim_pending_job() if not scheduler.queue else None
+            if dataset is None:
+                await asyncio.sleep(settings.WORKER_POLL_SECONDS)
+                continue
+            await scheduler.submit_job(str(dataset["_id"]), dataset["user_id"], dataset["pending_job"])
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -31,8 +31,21 @@ export const datasetAPI = {
       headers: { 'Content-Type': 'multipart/form-data' },
     });
   },
+  append: (datasetId, file) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    return api.post(`/datasets/${datasetId}/append`, formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+  },
   getAnalysis: (datasetId) => api.get(`/datasets/analysis/${datasetId}`),
   list: () => api.get('/datasets/list'),
+  query: (datasetId, spec) => api.post(`/datasets/${datasetId}/query`, spec),
+  downloadCleaned: (datasetId, format = 'csv', columns) =>
+    api.get(`/datasets/${datasetId}/cleaned`, {
+      params: { format, columns: columns?.join(',') },
+      responseType: 'blob',
+    }),
   chat: (datasetId, message) => api.post(`/chat/dataset/${datasetId}`, { message }),
 };
 